@@ -0,0 +1,651 @@
+"""CSC148 Assignment 2
+
+=== CSC148 Winter 2020 ===
+Department of Computer Science,
+University of Toronto
+
+This code is provided solely for the personal and private use of
+students taking the CSC148 course at the University of Toronto.
+Copying for purposes other than this use is expressly prohibited.
+All forms of distribution of this code, whether as given or with
+any changes, are expressly prohibited.
+
+Authors: Diane Horton, David Liu, Mario Badr, Sophia Huynh, Misha Schwartz,
+and Jaisie Sin
+
+All of the files in this directory and all subdirectories are:
+Copyright (c) Diane Horton, David Liu, Mario Badr, Sophia Huynh,
+Misha Schwartz, and Jaisie Sin
+
+=== Module Description ===
+
+This file contains timing and memory benchmarks for the Blocky data structures.
+Run it directly to print a report, e.g. `python benchmarks.py`.
+"""
+from __future__ import annotations
+from typing import Callable, List, Optional
+import gc
+import random
+import time
+import tracemalloc
+
+from block import Block, generate_board
+from goal import BlobGoal, PerimeterGoal, _flatten, score_goals, \
+    FLATTEN_CACHE
+from linear_board import LinearBoard
+from player import BeamPlayer, RandomPlayer, SearchOptions, SmartPlayer, \
+    _get_block, _random_move_generator, legal_moves
+from settings import BOARD_SIZE, COLOUR_LIST
+
+
+def full_board(max_depth: int) -> Block:
+    """Return a board of <max_depth> where every block above max_depth has
+    been subdivided, so that the board has exactly 4^max_depth leaves.
+
+    The leaf colours cycle through COLOUR_LIST so the board is deterministic.
+    """
+    board = Block((0, 0), BOARD_SIZE, COLOUR_LIST[0], 0, max_depth)
+    _subdivide(board)
+    return board
+
+
+# HELPER FUNCTION
+def _subdivide(block: Block) -> None:
+    """Give <block> and all its descendants four children until max_depth is
+    reached.
+    """
+    if block.level == block.max_depth:
+        return None
+    positions = block._children_positions()
+    size = block._child_size()
+    children = []
+    for i in range(4):
+        colour = COLOUR_LIST[(i + block.level) % len(COLOUR_LIST)]
+        children.append(Block(positions[i], size, colour, block.level + 1,
+                              block.max_depth))
+    block.colour = None
+    block.children = children
+    for child in children:
+        _subdivide(child)
+    return None
+
+
+def count_blocks(block: Block) -> int:
+    """Return the number of blocks in the tree rooted at <block>.
+    """
+    return 1 + sum(count_blocks(child) for child in block.children)
+
+
+def best_time(func: Callable[[], object], repeat: int = 5) -> float:
+    """Return the fastest of <repeat> runs of <func>, in seconds.
+
+    The garbage collector is paused while timing, as timeit does.
+    """
+    best = float('inf')
+    gc.disable()
+    try:
+        for _ in range(repeat):
+            start = time.perf_counter()
+            func()
+            best = min(best, time.perf_counter() - start)
+    finally:
+        gc.enable()
+    return best
+
+
+def bench_block_memory(depths: List[int]) -> None:
+    """Print the memory used per block and the time taken by create_copy for
+    full boards of each depth in <depths>.
+    """
+    print('depth  blocks    bytes/block  create_copy (ms)')
+    for depth in depths:
+        tracemalloc.start()
+        board = full_board(depth)
+        used = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        blocks = count_blocks(board)
+        repeat = 5 if depth < 7 else 1
+        copy_time = best_time(board.create_copy, repeat)
+        print(f'{depth:>5}  {blocks:>7}  {used / blocks:>12.1f}  '
+              f'{copy_time * 1000:>16.2f}')
+
+
+def bench_linear_copy(depths: List[int]) -> None:
+    """Print the time taken to copy full boards of each depth in <depths>,
+    as a Block tree and as a LinearBoard.
+    """
+    print('depth  Block.create_copy (ms)  LinearBoard.copy (ms)')
+    for depth in depths:
+        board = full_board(depth)
+        linear = LinearBoard.from_block(board)
+        block_time = best_time(board.create_copy)
+        linear_time = best_time(linear.copy)
+        print(f'{depth:>5}  {block_time * 1000:>22.3f}  '
+              f'{linear_time * 1000:>21.3f}')
+
+
+def random_board(max_depth: int, seed: int = 148) -> Block:
+    """Return the board generate_board makes for <max_depth> when the random
+    module is seeded with <seed>.
+    """
+    random.seed(seed)
+    return generate_board(max_depth, BOARD_SIZE)
+
+
+def bench_root_rotate(depths: List[int]) -> None:
+    """Print the time taken to rotate the root of a full board clockwise,
+    for each depth in <depths>, and the time taken by the first walk over
+    every block after the rotations.
+    """
+    print('depth   blocks  root rotate (ms)  first walk after (ms)')
+    for depth in depths:
+        board = full_board(depth)
+        repeat = 5 if depth < 9 else 2
+        rotate_time = best_time(lambda: board.rotate(1), repeat)
+        walk_time = best_time(lambda: count_blocks(board), 1)
+        print(f'{depth:>5}  {count_blocks(board):>7}  '
+              f'{rotate_time * 1000:>16.3f}  {walk_time * 1000:>21.3f}')
+
+
+def bench_shared_copy(depths: List[int]) -> None:
+    """Print the time taken to copy full boards of each depth in <depths>
+    and rotate one of the deepest blocks with children in the copy, using
+    deep copies and shared copies.
+    """
+    print('depth  deep copy + rotate (ms)  shared copy + rotate (ms)')
+    for depth in depths:
+        board = full_board(depth)
+
+        def copy_and_rotate(shared: bool) -> None:
+            block = board.create_copy(shared)
+            while block.level < depth - 1:
+                block = block.children[0]
+            block.rotate(1)
+
+        deep_time = best_time(lambda: copy_and_rotate(False), 3)
+        shared_time = best_time(lambda: copy_and_rotate(True), 3)
+        print(f'{depth:>5}  {deep_time * 1000:>23.3f}  '
+              f'{shared_time * 1000:>25.3f}')
+
+
+def bench_zobrist_hash(depths: List[int]) -> None:
+    """Print the time taken to hash full boards of each depth in <depths>
+    from scratch, and to hash them again after rotating one of the deepest
+    blocks with children.
+    """
+    print('depth  first hash (ms)  hash after a move (ms)')
+    for depth in depths:
+        board = full_board(depth)
+        first_time = best_time(board.zobrist_hash, 1)
+        block = board
+        while block.level < depth - 1:
+            block = block.children[3]
+
+        def move_and_hash() -> None:
+            block.rotate(1)
+            board.zobrist_hash()
+
+        move_time = best_time(move_and_hash)
+        print(f'{depth:>5}  {first_time * 1000:>15.3f}  '
+              f'{move_time * 1000:>22.3f}')
+
+
+def bench_colour_counts(depths: List[int]) -> None:
+    """Print the time taken to count the unit cells of one colour on full
+    boards of each depth in <depths> after painting one unit cell, by
+    flattening the board and with Block.colour_counts.
+    """
+    print('depth  _flatten count (ms)  colour_counts (ms)')
+    target = COLOUR_LIST[0]
+    for depth in depths:
+        board = full_board(depth)
+        board.colour_counts()
+        cell = board
+        while len(cell.children) != 0:
+            cell = cell.children[1]
+
+        def flatten_count() -> None:
+            cell.paint(COLOUR_LIST[len(COLOUR_LIST) - 1 - cell._colour])
+            sum(column.count(target) for column in _flatten(board))
+
+        def colour_count() -> None:
+            cell.paint(COLOUR_LIST[len(COLOUR_LIST) - 1 - cell._colour])
+            board.colour_counts().get(target, 0)
+
+        flatten_time = best_time(flatten_count, 1)
+        count_time = best_time(colour_count)
+        print(f'{depth:>5}  {flatten_time * 1000:>19.3f}  '
+              f'{count_time * 1000:>18.3f}')
+
+
+def bench_flatten(depths: List[int]) -> None:
+    """Print the time taken to flatten random boards of each depth in
+    <depths>, and to score them with each kind of goal, without using
+    FLATTEN_CACHE.
+    """
+    print('depth  _flatten (ms)  PerimeterGoal (ms)  BlobGoal (ms)')
+    for depth in depths:
+        board = random_board(depth)
+        repeat = 3 if depth < 7 else 1
+
+        def uncached(func: Callable[[], object]) -> Callable[[], object]:
+            return lambda: (FLATTEN_CACHE.clear(), func())
+
+        times = [best_time(uncached(lambda: _flatten(board)), repeat)]
+        for goal in [PerimeterGoal(COLOUR_LIST[0]), BlobGoal(COLOUR_LIST[0])]:
+            times.append(best_time(uncached(lambda: goal.score(board)),
+                                   repeat))
+        print(f'{depth:>5}  {times[0] * 1000:>13.2f}  {times[1] * 1000:>18.2f}'
+              f'  {times[2] * 1000:>13.2f}')
+
+
+def bench_flatten_cache(depths: List[int]) -> None:
+    """Print the time taken to score random boards of each depth in
+    <depths> for every colour, as GameOverState does, with and without
+    FLATTEN_CACHE, and the cache's hits and misses.
+    """
+    print('depth  uncached (ms)  cached (ms)  hits  misses')
+    goals = [PerimeterGoal(colour) for colour in COLOUR_LIST] + \
+        [BlobGoal(colour) for colour in COLOUR_LIST]
+    for depth in depths:
+        board = random_board(depth)
+
+        def score_all(clear: bool) -> None:
+            for goal in goals:
+                if clear:
+                    FLATTEN_CACHE.clear()
+                goal.score(board)
+
+        uncached_time = best_time(lambda: score_all(True), 3)
+        FLATTEN_CACHE.clear()
+        cached_time = best_time(lambda: score_all(False), 3)
+        print(f'{depth:>5}  {uncached_time * 1000:>13.2f}  '
+              f'{cached_time * 1000:>11.2f}  {FLATTEN_CACHE.hits:>4}  '
+              f'{FLATTEN_CACHE.misses:>6}')
+
+
+def bench_perimeter_goal(depths: List[int]) -> None:
+    """Print the time taken by PerimeterGoal.score on full boards of each
+    depth in <depths>, without using FLATTEN_CACHE.
+    """
+    print('depth  PerimeterGoal.score (ms)')
+    goal = PerimeterGoal(COLOUR_LIST[0])
+    for depth in depths:
+        board = full_board(depth)
+        score_time = best_time(lambda: (FLATTEN_CACHE.clear(),
+                                        goal.score(board)), 3)
+        print(f'{depth:>5}  {score_time * 1000:>24.3f}')
+
+
+def bench_perimeter_after_move(depths: List[int]) -> None:
+    """Print the time taken to score full boards of each depth in <depths>
+    with PerimeterGoal after rotating one of the deepest blocks with children
+    on the border, for every colour, as GameData.calculate_score does after
+    each move.
+    """
+    print('depth  move + score every colour (ms)')
+    goals = [PerimeterGoal(colour) for colour in COLOUR_LIST]
+    for depth in depths:
+        board = full_board(depth)
+        block = board
+        while block.level < depth - 1:
+            block = block.children[0]
+
+        def move_and_score() -> None:
+            block.rotate(1)
+            for goal in goals:
+                goal.score(board)
+
+        print(f'{depth:>5}  {best_time(move_and_score) * 1000:>30.3f}')
+
+
+def one_blob_board(max_depth: int) -> Block:
+    """Return a board of <max_depth> where every unit cell but one, in the top
+    right corner, has the first colour of COLOUR_LIST.
+
+    The board has a single blob of 4^max_depth - 1 unit cells.
+    """
+    board = Block((0, 0), BOARD_SIZE, COLOUR_LIST[0], 0, max_depth)
+    block = board
+    while block.level < max_depth:
+        positions = block._children_positions()
+        size = block._child_size()
+        block.colour = None
+        block.children = [Block(positions[i], size, COLOUR_LIST[0],
+                                block.level + 1, max_depth) for i in range(4)]
+        block = block.children[0]
+    block.colour = COLOUR_LIST[1]
+    return board
+
+
+def bench_blob_goal(depths: List[int]) -> None:
+    """Print the time taken by BlobGoal.score to score random boards of each
+    depth in <depths> for the first time, and boards that are one blob but
+    for a single unit cell.
+    """
+    print('depth  random board (ms)  one blob (ms)')
+    goal = BlobGoal(COLOUR_LIST[0])
+    for depth in depths:
+        times = []
+        for board in [random_board(depth), one_blob_board(depth)]:
+            times.append(best_time(lambda: goal.score(board), 1))
+        print(f'{depth:>5}  {times[0] * 1000:>17.1f}  {times[1] * 1000:>13.1f}')
+
+
+def bench_blob_after_move(depths: List[int]) -> None:
+    """Print the time taken to score full boards of each depth in <depths>
+    with BlobGoal after rotating one of the deepest blocks with children,
+    for every colour, as GameData.calculate_score does after each move.
+    """
+    print('depth  move + score every colour (ms)')
+    goals = [BlobGoal(colour) for colour in COLOUR_LIST]
+    for depth in depths:
+        board = full_board(depth)
+        block = board
+        while block.level < depth - 1:
+            block = block.children[3]
+        for goal in goals:
+            goal.score(board)
+
+        def move_and_score() -> None:
+            block.rotate(1)
+            for goal in goals:
+                goal.score(board)
+
+        print(f'{depth:>5}  {best_time(move_and_score) * 1000:>30.3f}')
+
+
+def bench_score_goals(depth: int, players: List[int]) -> None:
+    """Print the time taken to score the goals of each number of players in
+    <players> on a random board of <depth> after a move, as GameOverState
+    does, one goal at a time and with score_goals, for a Block and for a
+    LinearBoard.
+    """
+    print(f'players  one at a time / score_goals at depth {depth} (ms)')
+    print('         Block            LinearBoard')
+    board = random_board(depth)
+    block = board
+    while len(block.children) != 0:
+        block = block.children[1]
+    random.seed(0)
+    for count in players:
+        goals = [random.choice([PerimeterGoal, BlobGoal])(
+            random.choice(COLOUR_LIST)) for _ in range(count)]
+
+        def one_at_a_time(scored: object) -> None:
+            block.colour = COLOUR_LIST[len(COLOUR_LIST) - 1 - block._colour]
+            for goal in goals:
+                goal.score(scored)
+
+        def together(scored: object) -> None:
+            block.colour = COLOUR_LIST[len(COLOUR_LIST) - 1 - block._colour]
+            score_goals(scored, goals)
+
+        times = []
+        for scored in [board, LinearBoard.from_block(board)]:
+            times.append(best_time(lambda: one_at_a_time(scored)))
+            times.append(best_time(lambda: together(scored)))
+        print(f'{count:>7}  {times[0] * 1000:>6.2f} / {times[1] * 1000:>5.2f}'
+              f'    {times[2] * 1000:>6.2f} / {times[3] * 1000:>5.2f}')
+
+
+def bench_score_delta(depths: List[int]) -> None:
+    """Print the time taken to find how a rotation of one of the deepest
+    blocks with children would change the BlobGoal score of full boards of
+    each depth in <depths>, by scoring a copy with the move made on it and
+    with Goal.score_delta.
+    """
+    print('depth  copy + move + score (ms)  score_delta (ms)')
+    goal = BlobGoal(COLOUR_LIST[0])
+    for depth in depths:
+        board = full_board(depth)
+        goal.score(board)
+        block = board
+        while block.level < depth - 1:
+            block = block.children[3]
+
+        def copy_and_score() -> None:
+            copy = board.create_copy(True)
+            moved = copy
+            while moved.level < depth - 1:
+                moved = moved.children[3]
+            moved.rotate(1)
+            goal.score(copy)
+
+        copy_time = best_time(copy_and_score)
+        delta_time = best_time(lambda: goal.score_delta(board,
+                                                        ('rotate', 1, block)))
+        print(f'{depth:>5}  {copy_time * 1000:>24.3f}  '
+              f'{delta_time * 1000:>16.3f}')
+
+
+def bench_get_block(depth: int, lookups: int = 20000) -> None:
+    """Print the number of lookups per second _get_block manages at random
+    locations on a random board of <depth>, and on a one blob board of
+    <depth> whose only unit cell block is in the top right corner.
+
+    The lookups on the random board ask for random levels. The lookups on
+    the one blob board ask for the unit cells in its top right corner, so
+    they go all the way down the tree.
+    """
+    print(f'_get_block lookups per second at depth {depth}')
+    random.seed(0)
+    board = random_board(depth)
+    queries = [((random.randrange(BOARD_SIZE), random.randrange(BOARD_SIZE)),
+                random.randint(0, depth)) for _ in range(lookups)]
+    seconds = best_time(lambda: [_get_block(board, location, level)
+                                 for location, level in queries], 3)
+    print(f'  random board  {lookups / seconds:>10.0f}')
+    board = one_blob_board(depth)
+    queries = [((BOARD_SIZE - 1 - random.randrange(8), random.randrange(8)),
+                depth) for _ in range(lookups)]
+    seconds = best_time(lambda: [_get_block(board, location, level)
+                                 for location, level in queries], 3)
+    print(f'  one blob      {lookups / seconds:>10.0f}')
+
+
+def bench_legal_moves(depths: List[int]) -> None:
+    """Print the time taken to list every legal move on random boards of each
+    depth in <depths>, by trying each move with apply_move and undo_move,
+    and with legal_moves.
+    """
+    print('depth  legal moves  apply + undo (ms)  legal_moves (ms)')
+    moves = [('smash', None), ('rotate', 1), ('rotate', 3), ('swap', 0),
+             ('swap', 1), ('combine', None), ('paint', None)]
+    colour = COLOUR_LIST[0]
+    for depth in depths:
+        board = random_board(depth)
+
+        def try_moves() -> None:
+            blocks = [board]
+            for block in blocks:
+                blocks.extend(block.children)
+                for action in moves:
+                    record = block.apply_move(action, colour)
+                    if record is not None:
+                        block.undo_move(record)
+
+        count = len(legal_moves(board, colour, moves))
+        try_time = best_time(try_moves, 3)
+        list_time = best_time(lambda: legal_moves(board, colour, moves), 3)
+        print(f'{depth:>5}  {count:>11}  {try_time * 1000:>17.2f}  '
+              f'{list_time * 1000:>16.2f}')
+
+
+def bench_random_player(depths: List[int]) -> None:
+    """Print the time a RandomPlayer takes to choose a move on random boards
+    of each depth in <depths>, by picking random blocks until one has a
+    legal move, and with Block.count_moves.
+    """
+    print('depth  legal moves  rejection (ms)  count_moves (ms)')
+    moves = [('smash', None), ('rotate', 1), ('rotate', 3), ('swap', 0),
+             ('swap', 1), ('combine', None), ('paint', None)]
+    colour = COLOUR_LIST[0]
+    for depth in depths:
+        board = random_board(depth)
+        player = RandomPlayer(0, PerimeterGoal(colour))
+        count = board.count_moves(moves, colour)
+
+        def reject() -> None:
+            move = None
+            while move is None:
+                x = random.randint(0, board.size - 1)
+                y = random.randint(0, board.size - 1)
+                level = random.randint(0, board.max_depth)
+                block = _get_block(board, (x, y), level)
+                move = _random_move_generator(block, colour, moves)
+
+        def turn() -> None:
+            player._proceed = True
+            player.generate_move(board)
+
+        random.seed(0)
+        reject_time = best_time(reject, 3)
+        turn_time = best_time(turn, 3)
+        print(f'{depth:>5}  {count:>11}  {reject_time * 1000:>14.3f}  '
+              f'{turn_time * 1000:>16.3f}')
+
+
+def bench_smart_player(depth: int, difficulty: int) -> None:
+    """Print the time a SmartPlayer of <difficulty> takes to choose a move on
+    a random board of <depth>, for each kind of goal.
+    """
+    print(f'SmartPlayer({difficulty}) turn at depth {depth}')
+    for goal in [PerimeterGoal(COLOUR_LIST[0]), BlobGoal(COLOUR_LIST[0])]:
+        board = random_board(depth)
+        player = SmartPlayer(0, goal, difficulty)
+
+        def turn() -> None:
+            random.seed(0)
+            player._proceed = True
+            player.generate_move(board)
+
+        print(f'  {type(goal).__name__:<13} {best_time(turn, 3) * 1000:>9.1f} '
+              f'ms')
+
+
+def bench_exhaustive_smart_player(depths: List[int], difficulty: int) -> None:
+    """Print the time a SmartPlayer of <difficulty> takes to choose a move on
+    random boards of each depth in <depths> for a BlobGoal, sampling with
+    replacement and exhaustively, and how many scorings the exhaustive
+    player saved.
+    """
+    print(f'SmartPlayer({difficulty}) turn, sampled and exhaustive')
+    print('depth  legal moves  sampled (ms)  exhaustive (ms)  saved')
+    moves = [('smash', None), ('rotate', 1), ('rotate', 3), ('swap', 0),
+             ('swap', 1), ('combine', None), ('paint', None)]
+    goal = BlobGoal(COLOUR_LIST[0])
+    for depth in depths:
+        board = random_board(depth)
+        times = []
+        for player in [SmartPlayer(0, goal, difficulty),
+                       SmartPlayer(0, goal, difficulty,
+                                   SearchOptions(exhaustive=True))]:
+
+            def turn() -> None:
+                random.seed(0)
+                player._proceed = True
+                player.generate_move(board)
+
+            times.append(best_time(turn, 3))
+        count = board.count_moves(moves, goal.colour)
+        print(f'{depth:>5}  {count:>11}  {times[0] * 1000:>12.1f}  '
+              f'{times[1] * 1000:>15.1f}  {player.evaluations_saved:>5}')
+
+
+def bench_budget_smart_player(depths: List[int],
+                              budgets: List[float]) -> None:
+    """Print how many candidate moves a SmartPlayer with each of <budgets>
+    (in seconds) scores in a turn on random boards of each depth in
+    <depths> for a BlobGoal, and how long its slowest turn takes.
+    """
+    print('depth  budget (ms)  candidates  slowest turn (ms)')
+    for depth in depths:
+        board = random_board(depth)
+        for budget in budgets:
+            player = SmartPlayer(0, BlobGoal(COLOUR_LIST[0]), 0,
+                                 SearchOptions(budget=budget))
+            slowest = 0.0
+            for _ in range(5):
+                player._proceed = True
+                start = time.perf_counter()
+                player.generate_move(board)
+                slowest = max(slowest, time.perf_counter() - start)
+            turns = player.evaluations_per_turn
+            print(f'{depth:>5}  {budget * 1000:>11.0f}  '
+                  f'{sum(turns) // len(turns):>10}  '
+                  f'{slowest * 1000:>17.1f}')
+
+
+def bench_beam_player(depth: int, difficulty: int, plies: List[int],
+                      widths: List[int]) -> None:
+    """Print the time a BeamPlayer of <difficulty> takes to choose a move on
+    a random board of <depth> for a BlobGoal, the number of moves it scores
+    and how many it scores per second, for each number of <plies> and each
+    beam width in <widths>.
+    """
+    print(f'BeamPlayer({difficulty}) turn at depth {depth}')
+    print('plies  width  turn (ms)  nodes  nodes/s')
+    board = random_board(depth)
+    for ply_count in plies:
+        for width in widths:
+            player = BeamPlayer(0, BlobGoal(COLOUR_LIST[0]), difficulty,
+                                ply_count, width)
+
+            def turn() -> None:
+                random.seed(0)
+                player._proceed = True
+                player.generate_move(board)
+
+            turn_time = best_time(turn, 3)
+            print(f'{ply_count:>5}  {width:>5}  {turn_time * 1000:>9.1f}  '
+                  f'{player.evaluations_per_turn[-1]:>5}  '
+                  f'{player.nodes_per_second:>7.0f}')
+
+
+def bench_pooled_smart_player(depth: int, difficulty: int,
+                              workers: List[Optional[int]]) -> None:
+    """Print the time a SmartPlayer of <difficulty> takes to choose a move on
+    a random board of <depth> for a BlobGoal, with each number of <workers>,
+    where None means no workers. The workers are started before the turns
+    are timed.
+    """
+    print(f'SmartPlayer({difficulty}) turn at depth {depth} with workers')
+    board = random_board(depth)
+    for count in workers:
+        player = SmartPlayer(0, BlobGoal(COLOUR_LIST[0]), difficulty,
+                             SearchOptions(workers=count))
+
+        def turn() -> None:
+            random.seed(0)
+            player._proceed = True
+            player.generate_move(board)
+
+        label = 'serial' if count is None else f'{count} workers'
+        print(f'  {label:<10} {best_time(turn, 3) * 1000:>9.1f} ms')
+        player.close()
+
+
+if __name__ == '__main__':
+    bench_block_memory([3, 4, 5, 6, 7, 8])
+    bench_linear_copy([3, 5, 7])
+    bench_root_rotate([5, 6, 7, 8, 9, 10])
+    bench_shared_copy([3, 5, 7, 8])
+    bench_zobrist_hash([3, 5, 7, 8])
+    bench_colour_counts([4, 6, 8])
+    bench_flatten([4, 6, 8])
+    bench_flatten_cache([4, 6, 8])
+    bench_perimeter_goal([4, 6, 8, 9])
+    bench_perimeter_after_move([4, 6, 8, 9])
+    bench_blob_goal([4, 6, 7, 8, 10])
+    bench_blob_after_move([4, 6, 8])
+    bench_score_goals(7, [2, 4, 8, 16])
+    bench_score_delta([4, 6, 8])
+    bench_get_block(10)
+    bench_legal_moves([4, 6, 8])
+    bench_random_player([4, 6, 8])
+    bench_smart_player(5, 1000)
+    bench_pooled_smart_player(6, 1000, [None, 1, 2, 4])
+    bench_exhaustive_smart_player([2, 3, 5], 1000)
+    bench_budget_smart_player([3, 5, 7], [0.01, 0.05])
+    bench_beam_player(5, 100, [1, 2, 3], [1, 4, 8])
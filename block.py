@@ -22,11 +22,34 @@ Misha Schwartz, and Jaisie Sin
 This file contains the Block class, the main data structure used in the game.
 """
 from __future__ import annotations
-from typing import Optional, Tuple, List
+from typing import Any, Dict, Iterable, Optional, Tuple, List, Union
 import random
 import math
 
-from settings import colour_name, COLOUR_LIST
+from settings import colour_name, COLOUR_LIST, palette_index, palette_colour
+
+# The multipliers used to combine the hashes of a block's four children, and
+# the mask that keeps hashes to 64 bits.
+_CHILD_MULTIPLIERS = (0x9E3779B97F4A7C15, 0xC2B2AE3D27D4EB4F,
+                      0x165667B19E3779F9, 0x27D4EB2F165667C5)
+_MASK = (1 << 64) - 1
+
+# Only blocks at least this many levels above max_depth keep their blobs.
+# The blobs of the blocks below are quick to join again from the leaves, and
+# there are three times as many of them as of all the blocks above.
+_BLOB_HEIGHT = 2
+
+# The _children of every block that has none. Sharing one empty tuple saves
+# a list per leaf; see _ChildList for how a leaf gets a list of its own.
+_NO_CHILDREN = ()
+
+# The indices of the children along each side of a block, clockwise from the
+# top.
+_SIDE_CHILDREN = ((0, 1), (0, 3), (2, 3), (1, 2))
+
+# The same children, in the order they are met going clockwise around the
+# block.
+_SIDE_CHILDREN_CLOCKWISE = ((1, 0), (0, 3), (3, 2), (2, 1))
 
 
 def generate_board(max_depth: int, size: int) -> Block:
@@ -47,6 +70,39 @@ def generate_board(max_depth: int, size: int) -> Block:
     return board
 
 
+class _Clock:
+    """Counts of the events that every Block needs to know about.
+
+    The counts are kept outside the Block class because assigning to a class
+    attribute makes every attribute lookup on its instances slower.
+
+    === Public Attributes ===
+    rotations:
+        The number of rotations ever recorded in the _tag of any Block.
+    changes:
+        The number of changes ever made to any Block.
+    pins:
+        The number of times a Block with a parent has been given a position
+        of its own. While it is 0, only roots hold positions, so moves need
+        not clear any.
+    """
+    __slots__ = ('rotations', 'changes', 'pins')
+    rotations: int
+    changes: int
+    pins: int
+
+    def __init__(self) -> None:
+        """Initialize this clock with no events counted.
+        """
+        self.rotations = 0
+        self.changes = 0
+        self.pins = 0
+
+
+# The clock shared by all Blocks.
+_CLOCK = _Clock()
+
+
 class Block:
     """A square Block in the Blocky game, represented as a tree.
 
@@ -59,6 +115,11 @@ class Block:
     child's position. Indices 0, 1, 2, and 3 are the upper-right child,
     upper-left child, lower-left child, and lower-right child, respectively.
 
+    The values a Block works out from its descendants (its zobrist_hash,
+    colour_counts, perimeter_scores, largest_blob and count_moves) are kept up
+    to date as the board changes, so after a move they are worked out again
+    only for the ancestors of the block that was moved.
+
     === Public Attributes ===
     position:
         The (x, y) coordinates of the upper left corner of this Block.
@@ -78,6 +139,9 @@ class Block:
         The blocks into which this block is subdivided. The children are
         stored in this order: upper-right child, upper-left child,
         lower-left child, lower-right child.
+    version:
+        A number that changes whenever this Block or one of its descendants
+        changes. Rotating an ancestor of this Block does not change it.
 
     === Representation Invariants===
     - len(children) == 0 or len(children) == 4
@@ -87,17 +151,99 @@ class Block:
         - their level is one greater than that of this Block.
         - their position is determined by the position and size of this Block,
           and their index in this Block's list of children.
+        - their parent is this Block.
         - this Block's colour is None.
     - If this Block has no children:
         - its colour is not None.
     - level <= max_depth
     """
-    position: Tuple[int, int]
+    # === Private Attributes ===
+    # _position:
+    #   The coordinates of the upper left corner of this Block, or None if
+    #   they are derived from its parent, as they are for every block but
+    #   the root unless it was given a position of its own.
+    # _colour:
+    #   The index of <colour> in settings.PALETTE, or -1 if <colour> is None.
+    # _parent:
+    #   The Block whose children include this Block, or None if there is none.
+    # _children:
+    #   The list stored by <children>, not counting any pending rotation, or
+    #   _NO_CHILDREN if this Block has never had children.
+    # _tag:
+    #   The number of clockwise quarter turns that this Block and all its
+    #   descendants have been rotated by, but that have not yet been applied
+    #   to _children.
+    # _settled:
+    #   The value of _CLOCK.rotations when every ancestor of this Block was
+    #   last known to have a _tag of 0.
+    # _frozen:
+    #   An immutable snapshot of this Block's current contents, or None if it
+    #   has not been taken since this Block or a descendant last changed.
+    # _source:
+    #   The snapshot this Block was copied from, if its children have not
+    #   been created yet, or None.
+    # _cache:
+    #   What has been worked out about this Block's contents since this Block
+    #   or a descendant last changed, or None if nothing has. Leaves keep
+    #   nothing, since what there is to know about them is quick to work out.
+    # _version:
+    #   The value of _CLOCK.changes when this Block or a descendant last
+    #   changed, or when this Block was created. Blocks created between two
+    #   changes share the same int.
+    #
+    # Only the root of a board stores its position. Every other block works
+    # out its position from its parent's position and its index among its
+    # parent's children, so swapping a block only reorders a list and never
+    # has to visit the descendants to update their positions. A block with a
+    # parent can still be given a position of its own through the position
+    # setter; once any has been (see _Clock.pins), swaps and rotations clear
+    # the positions of the descendants they move, as they would have
+    # updated them before.
+    #
+    # A shared copy (see create_copy) starts out as a single Block with a
+    # _source. Its children are only created from the snapshot when they are
+    # first read, so a copy that is changed in one place only creates the
+    # blocks on the path to that place. Any change to a block gives the
+    # block and its ancestors a new _version and drops their _frozen
+    # snapshots and _caches. Rotations and swaps keep the counts of the
+    # caches, since they only move blocks around.
+    #
+    # What a block works out about its contents is kept in its _cache and
+    # made from what its children worked out, so after a move it is worked
+    # out again only for the ancestors of the block that was moved. Keeping a
+    # hash for every rotation of a block means that rotating it only changes
+    # the hashes of its ancestors, which pick the rotated hashes of their
+    # children by the children's tags. The edges work the same way: the
+    # sides of a block are made from the sides of the children that touch
+    # them, so only blocks on the border of a board are ever visited to
+    # compute its perimeter scores. The blobs of a block are made by joining
+    # its children's blobs along the edges between the children.
+    #
+    # Rotating a block only adds to its _tag. The tag is pushed down one
+    # level, reordering _children and adding to the children's tags, when the
+    # children are next read through <children> or changed. A block reached
+    # through a stale reference first pushes down the tags of its ancestors.
+    #
+    # Blocks use __slots__ instead of a per-instance __dict__, since a board
+    # (and every copy of it made by a SmartPlayer) holds thousands of them.
+    # __weakref__ lets goal.FLATTEN_CACHE refer to boards without keeping
+    # them alive.
+    __slots__ = ('_position', 'size', '_colour', 'level', 'max_depth',
+                 '_parent', '_children', '_tag', '_settled', '_frozen',
+                 '_source', '_cache', '_version', '__weakref__')
+    _position: Optional[Tuple[int, int]]
     size: int
-    colour: Optional[Tuple[int, int, int]]
+    _colour: int
     level: int
     max_depth: int
-    children: List[Block]
+    _parent: Optional[Block]
+    _children: Union[_ChildList, Tuple[()]]
+    _tag: int
+    _settled: int
+    _frozen: Optional[_Frozen]
+    _source: Optional[_Frozen]
+    _cache: Optional[_Cache]
+    _version: int
 
     def __init__(self, position: Tuple[int, int], size: int,
                  colour: Optional[Tuple[int, int, int]], level: int,
@@ -111,12 +257,183 @@ class Block:
             - level >= 0
             - max_depth >= level
         """
-        self.position = position
+        self._position = position
         self.size = size
-        self.colour = colour
+        self._colour = palette_index(colour)
         self.level = level
         self.max_depth = max_depth
-        self.children = []
+        self._parent = None
+        self._children = _NO_CHILDREN
+        self._tag = 0
+        self._settled = -1
+        self._frozen = None
+        self._source = None
+        self._cache = None
+        self._version = _CLOCK.changes
+
+    @property
+    def position(self) -> Tuple[int, int]:
+        """The (x, y) coordinates of the upper left corner of this Block.
+        """
+        if self._position is not None:
+            return self._position
+        parent = self._parent
+        x, y = parent.position
+        size = parent._child_size()
+        siblings = parent.children
+        if siblings[0] is self:
+            return x + size, y
+        elif siblings[1] is self:
+            return x, y
+        elif siblings[2] is self:
+            return x, y + size
+        else:
+            return x + size, y + size
+
+    @position.setter
+    def position(self, position: Tuple[int, int]) -> None:
+        """Move the upper left corner of this Block to <position>.
+
+        A Block with a parent keeps <position> until a swap, rotation or
+        _update_children_positions of an ancestor moves it again.
+        """
+        if self._parent is not None:
+            _CLOCK.pins += 1
+        self._position = position
+
+    def path(self) -> List[int]:
+        """Return the index of each block among its parent's children, on
+        the way from the root of this Block's board down to this Block.
+
+        Unlike a position, the path finds the same Block on a copy of the
+        board however the sizes of the blocks were rounded.
+
+        >>> board = Block((0, 0), 750, COLOUR_LIST[0], 0, 1)
+        >>> board.smash()
+        True
+        >>> board.children[2].path()
+        [2]
+        """
+        path = []
+        block = self
+        while block._parent is not None:
+            siblings = block._parent.children
+            path.append([i for i in range(len(siblings))
+                         if siblings[i] is block][0])
+            block = block._parent
+        path.reverse()
+        return path
+
+    @property
+    def children(self) -> List[Block]:
+        """The blocks into which this block is subdivided.
+        """
+        if self._tag != 0 or self._settled != _CLOCK.rotations:
+            self._settle()
+        if self._children is _NO_CHILDREN:
+            # The list becomes this Block's own when it is first changed.
+            return _ChildList(self)
+        return self._children
+
+    @children.setter
+    def children(self, children: List[Block]) -> None:
+        """Replace the children of this Block with <children>.
+
+        The blocks that are no longer children of this Block keep the
+        positions they had.
+        """
+        self._settle()
+        for child in self._children:
+            if child._parent is self:
+                child._position = child.position
+                child._parent = None
+        children = list(children)
+        if len(children) == 0:
+            self._children = _NO_CHILDREN
+        else:
+            self._children = _ChildList(self, children)
+        self._touch()
+
+    def _touch(self, counts: bool = True) -> None:
+        """Record that this Block has changed, so that neither it nor any of
+        its ancestors has a snapshot or hash of its old contents.
+
+        If <counts> is False, the change only moved unit cells around, so the
+        counts in the caches are kept.
+        """
+        _CLOCK.changes += 1
+        version = _CLOCK.changes
+        block = self
+        while block is not None:
+            block._version = version
+            block._frozen = None
+            if block._cache is not None:
+                block._cache = None if counts else block._cache.counts_only()
+            block = block._parent
+
+    def _cached(self) -> _Cache:
+        """Return this Block's cache, starting an empty one if it has none.
+
+        Precondition: this Block has children.
+        """
+        if self._cache is None:
+            self._cache = _Cache()
+        return self._cache
+
+    def _settle(self) -> None:
+        """Apply every pending rotation of this Block and its ancestors to
+        the order of this Block's children, creating the children first if
+        this Block is a shared copy that has not been read yet.
+        """
+        if self._settled != _CLOCK.rotations:
+            if self._parent is not None:
+                self._parent._settle()
+            self._settled = _CLOCK.rotations
+            if self._source is not None:
+                self._thaw_children()
+        tag = self._tag
+        if tag != 0:
+            self._tag = 0
+            children = self._children
+            if len(children) != 0:
+                # A quarter turn clockwise moves the child at index i to
+                # index i - 1, so after <tag> turns index j holds the child
+                # that was at index j + tag. The contents of this Block do
+                # not change, so its snapshot is kept.
+                list.__setitem__(children, slice(None), [
+                    children[tag % 4], children[(tag + 1) % 4],
+                    children[(tag + 2) % 4], children[(tag + 3) % 4]])
+                if self._cache is not None:
+                    self._cache = self._cache.turned(tag)
+                for child in children:
+                    if len(child._children) != 0 or \
+                            child._source is not None:
+                        child._tag = (child._tag + tag) % 4
+                        if child._frozen is not None:
+                            child._frozen = child._frozen.turned(tag)
+
+    def _thaw_children(self) -> None:
+        """Create the children of this shared copy from its snapshot.
+        """
+        children = _ChildList.__new__(_ChildList)
+        children._owner = self
+        list.extend(children, [_thaw(frozen, self)
+                               for frozen in self._source.children])
+        self._children = children
+        self._source = None
+
+    @property
+    def colour(self) -> Optional[Tuple[int, int, int]]:
+        """The colour of this Block if it is not subdivided, or None.
+        """
+        return palette_colour(self._colour)
+
+    @colour.setter
+    def colour(self, colour: Optional[Tuple[int, int, int]]) -> None:
+        """Set the colour of this Block to <colour>.
+        """
+        self._colour = palette_index(colour)
+        self._touch()
 
     def __str__(self) -> str:
         """Return this Block in a string format.
@@ -144,11 +461,13 @@ class Block:
         """Return True iff this Block and all its descendents are equivalent to
         the <other> Block and all its descendents.
         """
-        if len(self.children) == 0 and len(other.children) == 0:
+        if self.zobrist_hash() != other.zobrist_hash():
+            return False
+        elif len(self.children) == 0 and len(other.children) == 0:
             # Both self and other are leaves.
             return self.position == other.position and \
                    self.size == other.size and \
-                   self.colour == other.colour and \
+                   self._colour == other._colour and \
                    self.level == other.level and \
                    self.max_depth == other.max_depth
         elif len(self.children) != len(other.children):
@@ -163,6 +482,244 @@ class Block:
 
             return True
 
+    def zobrist_hash(self) -> int:
+        """Return a 64-bit hash of the structure and leaf colours of this
+        Block and its descendants, along with their levels and max_depth.
+
+        The hash does not depend on positions, so equal blocks at different
+        places on the board have the same hash. Blocks with different hashes
+        are never equal.
+
+        >>> block = Block((0, 0), 750, COLOUR_LIST[0], 0, 1)
+        >>> moved = Block((8, 8), 750, COLOUR_LIST[0], 0, 1)
+        >>> block.zobrist_hash() == moved.zobrist_hash()
+        True
+        """
+        if self._tag != 0 or self._settled != _CLOCK.rotations:
+            self._settle()
+        return self._zobrist_hashes()[0]
+
+    def _zobrist_hashes(self) -> Tuple[int, int, int, int]:
+        """Return the Zobrist hashes of this Block's contents as stored in
+        _children, ignoring _tag, after 0, 1, 2 and 3 clockwise quarter turns.
+        """
+        cache = self._cache
+        if cache is None or cache.hashes is None:
+            if self._source is not None:
+                self._thaw_children()
+            children = self._children
+            key = _mix((self.level << 40) | (self.max_depth << 32) |
+                       (self._colour + 1))
+            if len(children) == 0:
+                return key, key, key, key
+            else:
+                child_hashes = [child._zobrist_hashes() for child in children]
+                tags = [child._tag for child in children]
+                hashes = []
+                for turns in range(4):
+                    # After <turns> quarter turns, index i holds the child
+                    # stored at index i + turns, itself turned <turns> more.
+                    # A list of children being changed may briefly hold
+                    # fewer than four.
+                    total = key
+                    for i in range(len(children)):
+                        j = (i + turns) % len(children)
+                        total += _CHILD_MULTIPLIERS[i] * \
+                            child_hashes[j][(tags[j] + turns) % 4]
+                    hashes.append(_mix(total & _MASK))
+                cache = self._cached()
+                cache.hashes = tuple(hashes)
+        return cache.hashes
+
+    def colour_counts(self) -> Dict[Tuple[int, int, int], int]:
+        """Return the number of unit cells of each colour in this Block.
+
+        Colours with no unit cells in this Block are left out.
+
+        >>> block = Block((0, 0), 750, COLOUR_LIST[0], 0, 2)
+        >>> block.colour_counts() == {COLOUR_LIST[0]: 16}
+        True
+        """
+        return {palette_colour(index): count
+                for index, count in self._colour_counts().items()}
+
+    def _colour_counts(self) -> Dict[int, int]:
+        """Return the number of unit cells of each colour in this Block, by
+        palette index.
+
+        The dictionary returned is shared and must not be changed.
+        """
+        cache = self._cache
+        if cache is None or cache.counts is None:
+            if self._source is not None:
+                self._thaw_children()
+            if len(self._children) == 0:
+                if self._colour == -1:
+                    return {}
+                return {self._colour: 4 ** (self.max_depth - self.level)}
+            counts = {}
+            for child in self._children:
+                for index, count in child._colour_counts().items():
+                    counts[index] = counts.get(index, 0) + count
+            cache = self._cached()
+            cache.counts = counts
+        return cache.counts
+
+    def perimeter_scores(self) -> Dict[Tuple[int, int, int], int]:
+        """Return the perimeter score of each colour on this Block, as
+        PerimeterGoal scores a board.
+
+        Every unit cell on the perimeter of this Block scores one point for
+        its colour, and corner unit cells score two. Colours with no unit
+        cells on the perimeter are left out. Only the blocks that touch the
+        perimeter are visited to compute them.
+
+        >>> block = Block((0, 0), 750, COLOUR_LIST[0], 0, 2)
+        >>> block.perimeter_scores() == {COLOUR_LIST[0]: 16}
+        True
+        """
+        if self.level == self.max_depth:
+            # The only unit cell is a corner.
+            return {palette_colour(index): 2 * count
+                    for index, count in self._edge(0).items()}
+        scores = {}
+        for side in range(4):
+            for index, count in self._edge(side).items():
+                scores[index] = scores.get(index, 0) + count
+        return {palette_colour(index): score
+                for index, score in scores.items()}
+
+    def _edge(self, side: int) -> Dict[int, int]:
+        """Return the number of unit cells of each colour along <side> of
+        this Block, by palette index, ignoring _tag.
+
+        The sides are numbered clockwise from 0 at the top. The dictionary
+        returned is shared and must not be changed.
+        """
+        cache = self._cache
+        if cache is None or cache.edges is None or cache.edges[side] is None:
+            if self._source is not None:
+                self._thaw_children()
+            children = self._children
+            if len(children) == 0:
+                if self._colour == -1:
+                    return {}
+                return {self._colour: 2 ** (self.max_depth - self.level)}
+            counts = {}
+            for i in _SIDE_CHILDREN[side]:
+                child = children[i]
+                # A child turned <tag> times clockwise shows its side
+                # <side> - tag on <side>.
+                for index, count in \
+                        child._edge((side - child._tag) % 4).items():
+                    counts[index] = counts.get(index, 0) + count
+            cache = self._cached()
+            if cache.edges is None:
+                cache.edges = [None, None, None, None]
+            cache.edges[side] = counts
+        return cache.edges[side]
+
+    def largest_blob(self, colour: Tuple[int, int, int]) -> int:
+        """Return the number of unit cells in the largest blob of <colour> in
+        this Block, as BlobGoal scores a board.
+
+        A blob is a group of unit cells of the same colour connected by their
+        edges.
+
+        >>> block = Block((0, 0), 750, COLOUR_LIST[0], 0, 2)
+        >>> block.largest_blob(COLOUR_LIST[0])
+        16
+        """
+        blobs = self._find_blobs(palette_index(colour))
+        return max(blobs.largest, max(blobs.sizes, default=0))
+
+    def largest_blobs(self, colours: List[Tuple[int, int, int]]) -> \
+            Dict[Tuple[int, int, int], int]:
+        """Return the number of unit cells in the largest blob of each colour
+        in <colours> in this Block, as largest_blob would.
+
+        The blobs of all the colours are found in a single walk of this
+        Block, instead of one walk for each colour.
+
+        >>> block = Block((0, 0), 750, COLOUR_LIST[0], 0, 2)
+        >>> block.largest_blobs([COLOUR_LIST[0], COLOUR_LIST[1]]) == \\
+        ...     {COLOUR_LIST[0]: 16, COLOUR_LIST[1]: 0}
+        True
+        """
+        found = self._find_all_blobs([palette_index(colour)
+                                      for colour in colours])
+        largest = {}
+        for colour in colours:
+            blobs = found[palette_index(colour)]
+            largest[colour] = max(blobs.largest, max(blobs.sizes, default=0))
+        return largest
+
+    def _find_all_blobs(self, colours: List[int]) -> Dict[int, _Blobs]:
+        """Return the blobs of each colour in <colours>, by palette index, in
+        this Block, ignoring _tag.
+
+        Like _find_blobs, but the children are only visited once for all the
+        colours whose blobs are not already known.
+        """
+        if self._source is not None:
+            self._thaw_children()
+        children = self._children
+        if len(children) == 0:
+            width = 2 ** (self.max_depth - self.level)
+            return {colour: _Blobs.leaf(self._colour == colour, width)
+                    for colour in colours}
+        if self.max_depth - self.level < _BLOB_HEIGHT:
+            known = {}
+        else:
+            cache = self._cached()
+            if cache.blobs is None:
+                cache.blobs = {}
+            known = cache.blobs
+        missing = [colour for colour in colours if colour not in known]
+        if len(missing) != 0:
+            found = [child._find_all_blobs(missing) for child in children]
+            tags = [child._tag for child in children]
+            half = 2 ** (self.max_depth - self.level - 1)
+            for colour in missing:
+                known[colour] = _join_blobs(
+                    [blobs[colour] for blobs in found], tags, half)
+        return {colour: known[colour] for colour in colours}
+
+    def _find_blobs(self, colour: int) -> _Blobs:
+        """Return the blobs of the colour with palette index <colour> in this
+        Block, ignoring _tag.
+        """
+        if self._source is not None:
+            self._thaw_children()
+        children = self._children
+        if len(children) == 0:
+            return _Blobs.leaf(self._colour == colour,
+                               2 ** (self.max_depth - self.level))
+        known = None
+        if self.max_depth - self.level >= _BLOB_HEIGHT:
+            cache = self._cached()
+            if cache.blobs is None:
+                cache.blobs = {}
+            known = cache.blobs
+            if colour in known:
+                return known[colour]
+        blobs = _join_blobs([child._find_blobs(colour) for child in children],
+                            [child._tag for child in children],
+                            2 ** (self.max_depth - self.level - 1))
+        if known is not None:
+            known[colour] = blobs
+        return blobs
+
+    @property
+    def version(self) -> int:
+        """A number that changes whenever this Block or one of its descendants
+        changes.
+
+        A Block and its copies have the same version until one of them
+        changes.
+        """
+        return self._version
+
     def _child_size(self) -> int:
         """Return the size of this Block's children.
         """
@@ -174,8 +731,7 @@ class Block:
         The positions are returned in this order: upper-right child, upper-left
         child, lower-left child, lower-right child.
         """
-        x = self.position[0]
-        y = self.position[1]
+        x, y = self.position
         size = self._child_size()
 
         return [(x + size, y), (x, y), (x, y + size), (x + size, y + size)]
@@ -187,13 +743,17 @@ class Block:
         <position> is the (x, y) coordinates of the upper-left corner of this
         Block.
         """
-        if len(self.children) == 0:
-            self.position = position[0], position[1]
-        else:
-            self.position = position[0], position[1]
-            for i in range(4):
-                self.children[i]._update_children_positions(
-                    self._children_positions()[i])
+        self.position = position
+        for child in self._children:
+            child._derive_positions()
+
+    def _derive_positions(self) -> None:
+        """Make this Block and all its descendants derive their positions
+        from their parents.
+        """
+        self._position = None
+        for child in self._children:
+            child._derive_positions()
 
     def smashable(self) -> bool:
         """Return True iff this block can be smashed.
@@ -215,14 +775,17 @@ class Block:
         if not self.smashable():
             return False
         else:
-            self.colour = None
+            self._colour = -1
+            positions = self._children_positions()
+            size = self._child_size()
+            level = self.level + 1
+            children = []
             for i in range(4):
-                position = self._children_positions()[i]
-                size = self._child_size()
                 colour = COLOUR_LIST[random.randint(0, len(COLOUR_LIST)-1)]
-                level = self.level + 1
-                child = Block(position, size, colour, level, self.max_depth)
-                self.children.append(child)
+                child = Block(positions[i], size, colour, level, self.max_depth)
+                children.append(child)
+            # Setting all four at once records a single change.
+            self.children = children
 
             for child in self.children:
                 subdivide = random.random()
@@ -240,29 +803,24 @@ class Block:
 
         Precondition: <direction> is either 0 or 1
         """
-        if len(self.children) == 0:
+        children = self.children
+        if len(children) == 0:
             return False
+        elif direction == 1:
+            # vertically swapping the children in self.children
+            list.__setitem__(children, slice(None), [
+                children[3], children[2], children[1], children[0]])
         else:
-            # store original positions
-            positions = self._children_positions()
-            if direction == 1:
-                # vertically swapping the children in self.children
-                self.children[1], self.children[2], = self.children[2], \
-                    self.children[1]
-                self.children[0], self.children[3] = self.children[3], \
-                    self.children[0]
-            else:
-                # horizontally swapping the children in self.children
-                self.children[1], self.children[0] = self.children[0], \
-                    self.children[1]
-                self.children[2], self.children[3] = self.children[3], \
-                    self.children[2]
-            # updating children's positions
-            self.children[0]._update_children_positions(positions[0])
-            self.children[1]._update_children_positions(positions[1])
-            self.children[2]._update_children_positions(positions[2])
-            self.children[3]._update_children_positions(positions[3])
-            return True
+            # horizontally swapping the children in self.children
+            list.__setitem__(children, slice(None), [
+                children[1], children[0], children[3], children[2]])
+        for child in children:
+            children._adopt(child)
+            if _CLOCK.pins != 0:
+                # Descendants given positions of their own move too.
+                child._derive_positions()
+        self._touch(counts=False)
+        return True
 
     def rotate(self, direction: int) -> bool:
         """Rotate this Block and all its descendants.
@@ -274,27 +832,21 @@ class Block:
 
         Precondition: <direction> is either 1 or 3.
         """
-        if len(self.children) == 0:
+        if len(self._children) == 0 and self._source is None:
             return False
-        elif direction == 1:
-            # rotate clockwise
-            positions = self._children_positions()
-            for i in range(4):
-                self.children[i].rotate(direction)
-                self.children[i]._update_children_positions(positions[i - 1])
-            self.children[0], self.children[1], self.children[2], \
-                self.children[3] = self.children[1], self.children[2], \
-                self.children[3], self.children[0]
-            return True
         else:
-            # rotate counterclockwise
-            positions = self._children_positions()
-            for i in range(4):
-                self.children[i].rotate(direction)
-                self.children[i]._update_children_positions(positions[i - 3])
-            self.children[0], self.children[1], self.children[2], \
-                self.children[3] = self.children[3], self.children[0], \
-                self.children[1], self.children[2]
+            if _CLOCK.pins != 0:
+                # Descendants given positions of their own move too.
+                for child in self.children:
+                    child._derive_positions()
+            # The children are reordered lazily, see _settle.
+            self._tag = (self._tag + direction) % 4
+            _CLOCK.rotations += 1
+            # The cache does not depend on _tag, so only the ancestors' ones
+            # change.
+            cache = self._cache
+            self._touch(counts=False)
+            self._cache = cache
             return True
 
     def paint(self, colour: Tuple[int, int, int]) -> bool:
@@ -303,9 +855,11 @@ class Block:
 
         Return True iff this Block's colour was changed.
         """
+        index = palette_index(colour)
         if len(self.children) == 0 and self.level == self.max_depth and \
-                self.colour != colour:
-            self.colour = colour
+                self._colour != index:
+            self._colour = index
+            self._touch()
             return True
         return False
 
@@ -325,33 +879,711 @@ class Block:
         if self.level != self.max_depth - 1 or len(self.children) == 0:
             return False
         else:
-            majority_colour = []
-            colours = []
-            for child in self.children:
-                colours.append(child.colour)
-            for colour in colours:
-                if colours.count(colour) >= 2 and colour not in majority_colour:
-                    majority_colour.append(colour)
-            if len(majority_colour) == 1:
+            majority_colour = self._majority_colour()
+            if majority_colour is not None:
                 self.children = []
-                self.colour = majority_colour[0]
+                self._colour = majority_colour
                 return True
             return False
 
-    def create_copy(self) -> Block:
+    def _majority_colour(self) -> Optional[int]:
+        """Return the palette index of the majority colour of this Block's
+        children, as combine works it out, or None if there is none.
+
+        The order of the children does not matter, so any rotation still
+        pending is left alone.
+
+        Precondition: this Block has children.
+        """
+        if self._source is not None:
+            self._thaw_children()
+        colours = [child._colour for child in self._children]
+        majority_colour = None
+        for colour in colours:
+            if colours.count(colour) >= 2:
+                if majority_colour not in (None, colour):
+                    # Two colours tie.
+                    return None
+                majority_colour = colour
+        return majority_colour
+
+    def can_apply(self, action: Tuple[str, Optional[int]],
+                  colour: Optional[Tuple[int, int, int]] = None) -> bool:
+        """Return True iff apply_move(action, colour) would perform <action> on
+        this Block.
+
+        Only this Block and, for a combine, the colours of its children are
+        looked at, so nothing is copied, changed or undone.
+
+        >>> block = Block((0, 0), 750, (0, 0, 0), 0, 1)
+        >>> block.can_apply(('smash', None)), block.can_apply(('rotate', 1))
+        (True, False)
+        """
+        name = action[0]
+        leaf = len(self._children) == 0 and self._source is None
+        if name in ('rotate', 'swap'):
+            return not leaf
+        elif name == 'smash':
+            return leaf and self.level != self.max_depth
+        elif name == 'paint':
+            return leaf and self.level == self.max_depth and \
+                self._colour != palette_index(colour)
+        elif name == 'combine':
+            return not leaf and self.level == self.max_depth - 1 and \
+                self._majority_colour() is not None
+        # Passing always succeeds.
+        return True
+
+    def count_moves(self, moves: List[Tuple[str, Optional[int]]],
+                    colour: Optional[Tuple[int, int, int]] = None) -> int:
+        """Return the number of pairs of an action in <moves> and a block that
+        is this Block or one of its descendants, such that can_apply(action,
+        colour) is True for the block.
+
+        >>> block = Block((0, 0), 750, (0, 0, 0), 0, 1)
+        >>> block.count_moves([('smash', None), ('paint', None)], (0, 0, 0))
+        1
+        """
+        blocks, parents, smashable, combinable, units = self._move_counts()
+        count = 0
+        for name, _ in moves:
+            if name in ('rotate', 'swap'):
+                count += parents
+            elif name == 'smash':
+                count += smashable
+            elif name == 'paint':
+                count += sum(units.values()) - \
+                    units.get(palette_index(colour), 0)
+            elif name == 'combine':
+                count += combinable
+            else:
+                count += blocks
+        return count
+
+    def _move_counts(self) -> Tuple[int, int, int, int, Dict[int, int]]:
+        """Return the number of blocks, blocks with children, blocks that can
+        be smashed and blocks that can be combined in this Block, and the
+        number of unit cell leaves of each colour by palette index.
+
+        The dictionary returned is shared and must not be changed.
+        """
+        if self._cache is not None and self._cache.moves is not None:
+            return self._cache.moves
+        if self._source is not None:
+            self._thaw_children()
+        if len(self._children) == 0:
+            if self.level == self.max_depth:
+                return 1, 0, 0, 0, {self._colour: 1}
+            return 1, 0, 1, 0, {}
+        blocks, parents, smashable = 1, 1, 0
+        combinable = int(self.level == self.max_depth - 1 and
+                         self._majority_colour() is not None)
+        units = {}
+        for child in self._children:
+            counts = child._move_counts()
+            blocks += counts[0]
+            parents += counts[1]
+            smashable += counts[2]
+            combinable += counts[3]
+            for index, count in counts[4].items():
+                units[index] = units.get(index, 0) + count
+        moves = (blocks, parents, smashable, combinable, units)
+        self._cached().moves = moves
+        return moves
+
+    def apply_move(self, action: Tuple[str, Optional[int]],
+                   colour: Optional[Tuple[int, int, int]] = None) -> \
+            Optional[Tuple[str, Optional[int], int, List[Block], List[tuple]]]:
+        """Perform <action> on this Block, painting with <colour> if it is a
+        paint, and return a record of the move that undo_move can revert.
+
+        The record keeps the snapshots, hashes, colour counts, perimeter
+        tables, blobs and move counts of this Block and its ancestors from
+        before the move, so that undo_move can put them back instead of
+        leaving them to be worked out again.
+
+        <action> is one of the actions in actions.py, such as ('rotate', 1).
+        Return None, and leave this Block unchanged, if the move could not be
+        performed.
+
+        >>> block = Block((0, 0), 750, (0, 0, 0), 0, 1)
+        >>> record = block.apply_move(('smash', None))
+        >>> len(block.children)
+        4
+        >>> block.undo_move(record)
+        >>> block == Block((0, 0), 750, (0, 0, 0), 0, 1)
+        True
+        """
+        name, direction = action
+        # Push down any pending rotations first, so that the order of the
+        # children of every block on the path is the same after undo_move.
+        self._settle()
+        saved = []
+        block = self
+        while block is not None:
+            saved.append((block, block._version, block._frozen,
+                          block._cache))
+            block = block._parent
+        colour_index = self._colour
+        children = []
+        if name == 'rotate':
+            performed = self.rotate(direction)
+        elif name == 'swap':
+            performed = self.swap(direction)
+        elif name == 'smash':
+            performed = self.smash()
+        elif name == 'paint':
+            performed = self.paint(colour)
+        elif name == 'combine':
+            children = list(self.children)
+            performed = self.combine()
+        else:
+            # Passing always succeeds, and there is nothing to undo.
+            performed = True
+        if not performed:
+            return None
+        return name, direction, colour_index, children, saved
+
+    def undo_move(self, record: Tuple[str, Optional[int], int, List[Block],
+                                      List[tuple]]) -> None:
+        """Revert the move described by <record>, which was returned by
+        apply_move on this Block.
+
+        Undoing a smash removes the children it created. Undoing a combine puts
+        back the same Block objects that it removed.
+
+        Precondition: every move applied to the board after the move of
+        <record> has already been undone.
+        """
+        name, direction, colour_index, children, saved = record
+        if name == 'rotate':
+            self.rotate(4 - direction)
+        elif name == 'swap':
+            self.swap(direction)
+        elif name == 'smash':
+            self._colour = colour_index
+            self.children = []
+        elif name == 'paint':
+            self._colour = colour_index
+            self._touch()
+        elif name == 'combine':
+            self._colour = colour_index
+            self.children = children
+        # The board is back as it was before the move, once a rotation of
+        # this Block is pushed down again.
+        self._settle()
+        for block, version, frozen, cache in saved:
+            block._version, block._frozen = version, frozen
+            block._cache = cache
+
+    def create_copy(self, shared: bool = False) -> Block:
         """Return a new Block that is a deep copy of this Block.
 
         Remember that a deep copy has new blocks (not aliases) at every level.
+
+        If <shared> is True, the copy shares an immutable snapshot of this
+        Block's descendants instead, and only creates its own blocks as they
+        are read. Changing the copy never changes this Block, or the other
+        way around. Taking a shared copy again before this Block changes
+        reuses the same snapshot, so it takes constant time.
         """
-        if len(self.children) == 0:
-            return Block(self.position, self.size, self.colour, self.level,
-                         self.max_depth)
+        self._settle()
+        if shared:
+            copy = _thaw(self._snapshot(), None)
         else:
-            copy = Block(self.position, self.size, self.colour, self.level,
-                         self.max_depth)
-            for child in self.children:
-                copy.children.append(child.create_copy())
-            return copy
+            copy = self._copy(None)
+        copy._position = self.position
+        return copy
+
+    def _snapshot(self) -> _Frozen:
+        """Return an immutable snapshot of the contents of this Block,
+        not counting any rotation still pending in its ancestors.
+        """
+        if self._frozen is None:
+            if self._source is not None:
+                children = self._source.children
+            else:
+                children = tuple(child._snapshot() for child in self._children)
+            self._frozen = _Frozen(self, children)
+        return self._frozen
+
+    def _copy(self, parent: Optional[Block]) -> Block:
+        """Return a deep copy of this Block as a child of <parent>, whose
+        position is derived from <parent>.
+        """
+        # Bypass __init__ so the palette index is copied as is.
+        copy = Block.__new__(Block)
+        copy._position = None
+        copy.size, copy._colour = self.size, self._colour
+        copy.level, copy.max_depth = self.level, self.max_depth
+        copy._parent = parent
+        copy._tag, copy._settled = self._tag, -1
+        copy._frozen, copy._source = self._frozen, self._source
+        copy._cache = self._cache
+        copy._version = self._version
+        if len(self._children) == 0:
+            copy._children = _NO_CHILDREN
+        else:
+            children = _ChildList.__new__(_ChildList)
+            children._owner = copy
+            list.extend(children, [child._copy(copy)
+                                   for child in self._children])
+            copy._children = children
+        return copy
+
+
+# HELPER FUNCTION
+def _mix(value: int) -> int:
+    """Return <value> with its 64 bits thoroughly mixed, using the finalizer
+    of the SplitMix64 generator.
+    """
+    value = (value + 0x9E3779B97F4A7C15) & _MASK
+    value = ((value ^ (value >> 30)) * 0xBF58476D1CE4E5B9) & _MASK
+    value = ((value ^ (value >> 27)) * 0x94D049BB133111EB) & _MASK
+    return value ^ (value >> 31)
+
+
+# HELPER FUNCTION
+def _thaw(frozen: _Frozen, parent: Optional[Block]) -> Block:
+    """Return a new Block with the contents of <frozen> as a child of
+    <parent>, whose children are created from <frozen> when first read.
+    """
+    block = Block.__new__(Block)
+    block._position = None
+    block.size, block._colour = frozen.size, frozen.colour
+    block.level, block.max_depth = frozen.level, frozen.max_depth
+    block._parent = parent
+    block._tag, block._settled = frozen.tag, -1
+    block._frozen = frozen
+    block._source = frozen if len(frozen.children) != 0 else None
+    block._cache = None
+    block._version = frozen.version
+    block._children = _NO_CHILDREN
+    return block
+
+
+class _Frozen:
+    """An immutable snapshot of the contents of a Block, shared by all the
+    copies made from it.
+
+    === Public Attributes ===
+    size, colour, level, max_depth, tag:
+        The size, palette index of the colour, level, max_depth and pending
+        rotation of the Block.
+    children:
+        Snapshots of the Block's children, in the order of its _children.
+    version:
+        The version of the Block.
+    """
+    __slots__ = ('size', 'colour', 'level', 'max_depth', 'tag', 'children',
+                 'version')
+    size: int
+    colour: int
+    level: int
+    max_depth: int
+    tag: int
+    children: Tuple[_Frozen, ...]
+    version: int
+
+    def __init__(self, block: Block, children: Tuple[_Frozen, ...]) -> None:
+        """Initialize this snapshot of <block>, whose children have the
+        snapshots <children>.
+        """
+        self.size, self.colour = block.size, block._colour
+        self.level, self.max_depth = block.level, block.max_depth
+        self.tag = block._tag
+        self.children = children
+        self.version = block._version
+
+    def turned(self, turns: int) -> _Frozen:
+        """Return a snapshot of the same Block rotated clockwise by <turns>
+        more quarter turns.
+        """
+        turned = _Frozen.__new__(_Frozen)
+        turned.size, turned.colour = self.size, self.colour
+        turned.level, turned.max_depth = self.level, self.max_depth
+        turned.tag = (self.tag + turns) % 4
+        turned.children, turned.version = self.children, self.version
+        return turned
+
+
+class _Cache:
+    """What a Block with children has worked out about its contents.
+
+    A cache is only ever filled in, never changed, so it can be shared by
+    copies of a Block and kept by the move journal. A Block that changes
+    drops its cache or replaces it.
+
+    === Public Attributes ===
+    hashes:
+        The Zobrist hashes of the Block's contents as stored in its
+        _children, ignoring its _tag, after 0, 1, 2 and 3 clockwise quarter
+        turns, or None.
+    counts:
+        The number of unit cells of each colour in the Block, by palette
+        index, or None.
+    edges:
+        For each side of the Block, clockwise from the top, the number of
+        unit cells of each colour along that side, by palette index, ignoring
+        the Block's _tag, or None. A side that has not been counted is None.
+    blobs:
+        The blobs of each colour in the Block, by palette index, ignoring its
+        _tag, or None. A colour whose blobs have not been found is missing.
+        Only Blocks at least _BLOB_HEIGHT levels above max_depth keep any.
+    moves:
+        The number of blocks, blocks with children, blocks that can be
+        smashed and blocks that can be combined in the Block, and the number
+        of unit cell leaves of each colour by palette index, or None.
+    """
+    __slots__ = ('hashes', 'counts', 'edges', 'blobs', 'moves')
+    hashes: Optional[Tuple[int, int, int, int]]
+    counts: Optional[Dict[int, int]]
+    edges: Optional[List[Optional[Dict[int, int]]]]
+    blobs: Optional[Dict[int, _Blobs]]
+    moves: Optional[Tuple[int, int, int, int, Dict[int, int]]]
+
+    def __init__(self) -> None:
+        """Initialize this empty cache.
+        """
+        self.hashes = self.counts = self.edges = self.blobs = None
+        self.moves = None
+
+    def counts_only(self) -> Optional[_Cache]:
+        """Return a cache with only the counts and moves of this one, which
+        stay the same when blocks are only moved around, or None if it
+        would be empty.
+        """
+        if self.counts is None and self.moves is None:
+            return None
+        cache = _Cache()
+        cache.counts, cache.moves = self.counts, self.moves
+        return cache
+
+    def turned(self, turns: int) -> _Cache:
+        """Return the cache of the same Block with <turns> clockwise quarter
+        turns applied to the order of its children.
+        """
+        cache = _Cache()
+        cache.counts, cache.moves = self.counts, self.moves
+        if self.hashes is not None:
+            cache.hashes = self.hashes[turns:] + self.hashes[:turns]
+        if self.edges is not None:
+            # Side s now shows what was on side s - turns.
+            cache.edges = self.edges[-turns:] + self.edges[:-turns]
+        if self.blobs is not None:
+            cache.blobs = {colour: blobs.turned(turns)
+                           for colour, blobs in self.blobs.items()}
+        return cache
+
+
+class _Blobs:
+    """The blobs of one colour in a Block.
+
+    Only the blobs that touch the sides of the Block can still grow when the
+    Block is joined to its neighbours, so only they are described in full.
+
+    === Public Attributes ===
+    largest:
+        The number of unit cells in the largest blob that does not touch any
+        side of the Block, or 0 if there is none.
+    sizes:
+        The number of unit cells in each blob that touches a side of the
+        Block, indexed by blob number.
+    sides:
+        For each side of the Block, clockwise from the top, the stretches of
+        that side covered by blobs, as (start, end, blob) tuples. A stretch
+        covers the unit cells from start up to but not including end, counted
+        clockwise around the Block from the start of the side, and the
+        stretches of each side are in that order.
+    """
+    __slots__ = ('largest', 'sizes', 'sides')
+    largest: int
+    sizes: List[int]
+    sides: Tuple[List[Tuple[int, int, int]], ...]
+
+    def __init__(self, largest: int, sizes: List[int],
+                 sides: Tuple[List[Tuple[int, int, int]], ...]) -> None:
+        """Initialize these blobs with <largest>, <sizes> and <sides>.
+        """
+        self.largest, self.sizes, self.sides = largest, sizes, sides
+
+    @staticmethod
+    def leaf(filled: bool, width: int) -> _Blobs:
+        """Return the blobs of a leaf <width> unit cells wide, which is one
+        blob if it is <filled> with the colour and has none otherwise.
+        """
+        if not filled:
+            return _Blobs(0, [], ([], [], [], []))
+        return _Blobs(0, [width * width], ([(0, width, 0)], [(0, width, 0)],
+                                           [(0, width, 0)], [(0, width, 0)]))
+
+    def turned(self, turns: int) -> _Blobs:
+        """Return the blobs of the same Block rotated clockwise by <turns>
+        quarter turns.
+
+        The stretches are counted clockwise, so a rotation only moves each
+        side's stretches to another side.
+        """
+        sides = self.sides
+        return _Blobs(self.largest, self.sizes, tuple(
+            sides[(side - turns) % 4] for side in range(4)))
+
+
+# HELPER FUNCTION
+def _join_blobs(children: List[_Blobs], tags: List[int], half: int) -> _Blobs:
+    """Return the blobs of a Block whose children, <half> unit cells wide,
+    have the blobs <children> and the pending rotations <tags>.
+    """
+    sides = [[blobs.sides[(side - tag) % 4] for side in range(4)]
+             for blobs, tag in zip(children, tags)]
+    bases = []
+    sizes = []
+    for blobs in children:
+        bases.append(len(sizes))
+        sizes.extend(blobs.sizes)
+    parents = list(range(len(sizes)))
+    # Along the edges between the children, the stretches of one child run
+    # the opposite way to those of the other.
+    for first, first_side, second, second_side, flip in \
+            [(1, 1, 0, 3, False), (2, 1, 3, 3, False),
+             (1, 2, 2, 0, True), (0, 2, 3, 0, True)]:
+        _join_stretches(_flipped(sides[first][first_side], half, flip),
+                        bases[first],
+                        _flipped(sides[second][second_side], half, not flip),
+                        bases[second], parents)
+    # Blobs are renumbered in the order they are met clockwise from the upper
+    # left corner.
+    numbers = {}
+    joined = []
+    for side, (first, second) in enumerate(_SIDE_CHILDREN_CLOCKWISE):
+        stretches = []
+        for child, offset in [(first, 0), (second, half)]:
+            for start, end, blob in sides[child][side]:
+                root = _find(parents, bases[child] + blob)
+                number = numbers.setdefault(root, len(numbers))
+                if len(stretches) != 0 and stretches[-1][1] == start + offset \
+                        and stretches[-1][2] == number:
+                    stretches[-1] = (stretches[-1][0], end + offset, number)
+                else:
+                    stretches.append((start + offset, end + offset, number))
+        joined.append(stretches)
+    totals = {}
+    for blob, size in enumerate(sizes):
+        root = _find(parents, blob)
+        totals[root] = totals.get(root, 0) + size
+    largest = max(blobs.largest for blobs in children)
+    joined_sizes = [0] * len(numbers)
+    for root, size in totals.items():
+        if root in numbers:
+            joined_sizes[numbers[root]] = size
+        elif size > largest:
+            largest = size
+    return _Blobs(largest, joined_sizes, tuple(joined))
+
+
+# HELPER FUNCTION
+def _flipped(stretches: List[Tuple[int, int, int]], width: int,
+             flip: bool) -> List[Tuple[int, int, int]]:
+    """Return <stretches> along a side <width> unit cells long, counted from
+    the other end of the side if <flip> is True.
+    """
+    if not flip:
+        return stretches
+    return [(width - end, width - start, blob)
+            for start, end, blob in reversed(stretches)]
+
+
+# HELPER FUNCTION
+def _join_stretches(first: List[Tuple[int, int, int]], first_base: int,
+                    second: List[Tuple[int, int, int]], second_base: int,
+                    parents: List[int]) -> None:
+    """Join every pair of blobs in <first> and <second> whose stretches
+    overlap, where <first> and <second> are the stretches along two sides
+    that face each other, counted the same way.
+
+    The blobs of <first> and <second> are numbered from <first_base> and
+    <second_base> in the union-find forest <parents>.
+    """
+    i = j = 0
+    while i < len(first) and j < len(second):
+        start, end, blob = first[i]
+        other_start, other_end, other = second[j]
+        if start < other_end and other_start < end:
+            root = _find(parents, first_base + blob)
+            other_root = _find(parents, second_base + other)
+            if root != other_root:
+                parents[other_root] = root
+        if end <= other_end:
+            i += 1
+        else:
+            j += 1
+
+
+# HELPER FUNCTION
+def _find(parents: List[int], blob: int) -> int:
+    """Return the root of the tree containing <blob> in the union-find forest
+    <parents>, halving the path to it on the way.
+    """
+    while parents[blob] != blob:
+        parents[blob] = parents[parents[blob]]
+        blob = parents[blob]
+    return blob
+
+
+class _ChildList(list):
+    """The list of children of a Block.
+
+    Every block put into the list becomes a child of the Block that owns the
+    list, and derives its position from it. Every block taken out keeps the
+    position it had. Any change to the list is recorded by the owner, as if
+    the owner had been changed.
+
+    A Block with no children shares _NO_CHILDREN instead of owning a list,
+    and hands out a new, empty list each time its children are read. The
+    first of those lists to be changed becomes the Block's own.
+    """
+    # === Private Attributes ===
+    # _owner:
+    #   The Block whose children are in this list.
+    __slots__ = ('_owner',)
+    _owner: Block
+
+    def __init__(self, owner: Block, children: Iterable[Block] = ()) -> None:
+        """Initialize this list with <children>, as the children of <owner>.
+        """
+        list.__init__(self, children)
+        self._owner = owner
+        for child in self:
+            self._adopt(child)
+
+    def _adopt(self, child: Block) -> None:
+        """Make <child> a child of the owner of this list.
+        """
+        child._parent = self._owner
+        child._position = None
+        child._settled = -1
+
+    def _positions(self, children: Iterable[Block]) -> \
+            List[Tuple[Block, Tuple[int, int]]]:
+        """Return each of <children> that is a child of the owner of this
+        list, with its position.
+        """
+        return [(child, child.position) for child in children
+                if child._parent is self._owner]
+
+    def _release(self, positions: List[Tuple[Block, Tuple[int, int]]]) -> \
+            None:
+        """Give each block in <positions> that is no longer in this list the
+        position it is paired with, and make it a child of no Block.
+        """
+        for child, position in positions:
+            if child._parent is self._owner and \
+                    all(other is not child for other in self):
+                child._position = position
+                child._parent = None
+
+    def _changed(self) -> None:
+        """Record that this list has changed, making it the owner's own list
+        if the owner had none.
+        """
+        if self._owner._children is _NO_CHILDREN:
+            self._owner._children = self
+        self._owner._touch()
+
+    def append(self, child: Block) -> None:
+        """Add <child> to the end of this list.
+        """
+        list.append(self, child)
+        self._adopt(child)
+        self._changed()
+
+    def extend(self, children: Iterable[Block]) -> None:
+        """Add <children> to the end of this list.
+        """
+        for child in children:
+            self.append(child)
+
+    def insert(self, index: int, child: Block) -> None:
+        """Insert <child> before <index>.
+        """
+        list.insert(self, index, child)
+        self._adopt(child)
+        self._changed()
+
+    def __iadd__(self, children: Iterable[Block]) -> _ChildList:
+        """Add <children> to the end of this list.
+        """
+        self.extend(children)
+        return self
+
+    def __imul__(self, times: int) -> _ChildList:
+        """Repeat the contents of this list <times> times.
+        """
+        if times <= 0:
+            self.clear()
+        else:
+            list.__imul__(self, times)
+            self._changed()
+        return self
+
+    def __setitem__(self, index: Any, value: Any) -> None:
+        """Store <value> at <index>, which may be a slice.
+        """
+        if isinstance(index, slice):
+            value = list(value)
+            positions = self._positions(self[index])
+            list.__setitem__(self, index, value)
+            for child in value:
+                self._adopt(child)
+        else:
+            positions = self._positions([self[index]])
+            list.__setitem__(self, index, value)
+            self._adopt(value)
+        self._release(positions)
+        self._changed()
+
+    def __delitem__(self, index: Any) -> None:
+        """Remove the child or children at <index>, which may be a slice.
+        """
+        old = self[index] if isinstance(index, slice) else [self[index]]
+        positions = self._positions(old)
+        list.__delitem__(self, index)
+        self._release(positions)
+        self._changed()
+
+    def pop(self, index: int = -1) -> Block:
+        """Remove and return the child at <index>.
+        """
+        positions = self._positions([self[index]])
+        child = list.pop(self, index)
+        self._release(positions)
+        self._changed()
+        return child
+
+    def remove(self, child: Block) -> None:
+        """Remove the first child equal to <child>.
+        """
+        self.pop(self.index(child))
+
+    def clear(self) -> None:
+        """Remove every child.
+        """
+        positions = self._positions(self)
+        list.clear(self)
+        self._release(positions)
+        self._changed()
+
+    def reverse(self) -> None:
+        """Reverse the order of the children.
+        """
+        list.reverse(self)
+        self._changed()
+
+    def sort(self, *, key: Any = None, reverse: bool = False) -> None:
+        """Sort the children, as list.sort does.
+        """
+        list.sort(self, key=key, reverse=reverse)
+        self._changed()
 
 
 if __name__ == '__main__':
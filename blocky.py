@@ -23,19 +23,21 @@ This file contains the different game states for the Blocky game.
 """
 
 from __future__ import annotations
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, List, Optional, Tuple, Union
 import pygame
 
 from actions import ACTION_MESSAGE, ROTATE_CLOCKWISE, ROTATE_COUNTER_CLOCKWISE,\
     SWAP_HORIZONTAL, SWAP_VERTICAL, SMASH, PASS, PAINT, COMBINE, ACTION_PENALTY
 from block import Block
+from goal import score_goals
+from linear_board import LinearBoard
 from player import Player
 from renderer import Renderer
 from settings import ANIMATION_DURATION
 
 
-def _block_to_squares(board: Block) -> List[Tuple[Tuple[int, int, int],
-                                                  Tuple[int, int], int]]:
+def _block_to_squares(board: Union[Block, LinearBoard]) -> \
+        List[Tuple[Tuple[int, int, int], Tuple[int, int], int]]:
     """Return a list of tuples describing all of the squares to be drawn
     in order to render this Block.
 
@@ -46,12 +48,15 @@ def _block_to_squares(board: Block) -> List[Tuple[Tuple[int, int, int],
     - the size of the block,
     in that order.
 
-    The order of the squares does not matter.
+    The order of the squares does not matter. <board> may also be a
+    LinearBoard.
 
     >>> b = Block((-375, 375), 750, (1, 128, 181), 0, 1)
     >>> _block_to_squares(b)
     [((1, 128, 181), (-375, 375), 750)]
     """
+    if isinstance(board, LinearBoard):
+        return board.to_squares()
     if board.colour is not None:
         return [(board.colour, board.position, board.size)]
     else:
@@ -116,13 +121,29 @@ class GameData:
         on the actions they've taken.
         """
         goal_score = self.players[player_id].goal.score(self.board)
+        return goal_score, self._penalty(player_id)
 
-        penalty = self.smashes[player_id] * ACTION_PENALTY[SMASH] + \
+    def calculate_scores(self) -> Dict[int, Tuple[int, int]]:
+        """Return a dictionary mapping the id of every player to a tuple
+        containing first their score based on their goal in the game and second
+        the deductions from their score based on the actions they've taken.
+
+        All the goals are scored together, so that the board is only walked
+        once however many players there are.
+        """
+        goal_scores = score_goals(self.board,
+                                  [player.goal for player in self.players])
+        return {player.id: (goal_score, self._penalty(player.id))
+                for player, goal_score in zip(self.players, goal_scores)}
+
+    def _penalty(self, player_id: int) -> int:
+        """Return the deductions from <player_id>'s score based on the actions
+        they've taken.
+        """
+        return self.smashes[player_id] * ACTION_PENALTY[SMASH] + \
             self.combines[player_id] * ACTION_PENALTY[COMBINE] + \
             self.paints[player_id] * ACTION_PENALTY[PAINT]
 
-        return goal_score, penalty
-
 
 class GameState:
     """One of the different states that a Blocky game can be in.
@@ -353,8 +374,9 @@ class GameOverState(GameState):
         """Initialize this GameState.
         """
         self._scores = []
+        scores = data.calculate_scores()
         for p in data.players:
-            goal_score, penalty = data.calculate_score(p.id)
+            goal_score, penalty = scores[p.id]
             self._scores.append((p.id, goal_score, penalty))
 
         self._winner = max(self._scores, key=lambda item: item[1] - item[2])[0]
@@ -393,7 +415,8 @@ if __name__ == '__main__':
         'allowed-io': ['run_game'],
         'allowed-import-modules': [
             'doctest', 'python_ta', 'random', 'typing', 'pygame', '__future__',
-            'block', 'player', 'renderer', 'settings', 'actions'
+            'block', 'player', 'renderer', 'settings', 'actions',
+            'linear_board', 'goal'
         ],
         'generated-members': 'pygame.*'
     })
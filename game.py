@@ -71,25 +71,29 @@ class Game:
         self._data.max_turns = num_turns
         clock = pygame.time.Clock()
 
-        while True:
-            clock.tick(30)
-
-            # Process events
-            for e in pygame.event.get():
-                if e.type == pygame.QUIT:
-                    return
-                else:
-                    self._state.process_event(e)
-
-            # Update the state of the game
-            self._state = self._state.update()
-
-            # Render the new state of the game
-            self._renderer.clear()
-            self._state.render(self._renderer)
-
-            # Update the screen
-            pygame.display.flip()
+        try:
+            while True:
+                clock.tick(30)
+
+                # Process events
+                for e in pygame.event.get():
+                    if e.type == pygame.QUIT:
+                        return
+                    else:
+                        self._state.process_event(e)
+
+                # Update the state of the game
+                self._state = self._state.update()
+
+                # Render the new state of the game
+                self._renderer.clear()
+                self._state.render(self._renderer)
+
+                # Update the screen
+                pygame.display.flip()
+        finally:
+            for player in self._data.players:
+                player.close()
 
 
 def create_auto_game() -> Game:
@@ -23,9 +23,12 @@ This file contains the hierarchy of Goal classes.
 """
 from __future__ import annotations
 import random
-from typing import List, Tuple
+import weakref
+from typing import Callable, Dict, List, Optional, Tuple, Union
+import numpy as np
 from block import Block
-from settings import colour_name, COLOUR_LIST
+from linear_board import LinearBoard
+from settings import colour_name, COLOUR_LIST, palette_colour, palette_index
 
 
 def generate_goals(num_goals: int) -> List[Goal]:
@@ -55,7 +58,97 @@ def generate_goals(num_goals: int) -> List[Goal]:
     return goals
 
 
-def _flatten(block: Block) -> List[List[Tuple[int, int, int]]]:
+class FlattenCache:
+    """A cache of the rasters of the boards that were rasterized most
+    recently, so that scoring an unchanged board again does not rasterize it
+    again. The score is still worked out from the raster each time.
+
+    A raster is reused for as long as the version of its board stays the
+    same. Only boards at level 0 are cached, since a block inside a board
+    also changes when one of its ancestors is rotated. The cache does not
+    keep its boards alive: the raster of a board that is no longer used
+    anywhere else is dropped.
+
+    === Public Attributes ===
+    hits:
+        The number of rasters that were found in this cache.
+    misses:
+        The number of rasters that had to be made.
+
+    === Representation Invariants ===
+    - hits >= 0 and misses >= 0
+    """
+    # === Private Attributes ===
+    # _capacity:
+    #   The largest number of boards whose rasters are kept.
+    # _entries:
+    #   A weak reference to the board, its version and its raster, by the id
+    #   of the board, from the least to the most recently used. An entry is
+    #   removed when its board is garbage collected, before its id can be
+    #   reused.
+    hits: int
+    misses: int
+    _capacity: int
+    _entries: Dict[int, Tuple[weakref.ref, int, np.ndarray]]
+
+    def __init__(self, capacity: int) -> None:
+        """Initialize this empty cache, which keeps the rasters of up to
+        <capacity> boards.
+        """
+        self.hits = 0
+        self.misses = 0
+        self._capacity = capacity
+        self._entries = {}
+
+    def raster(self, block: Block) -> np.ndarray:
+        """Return the raster of <block>, in the format returned by _rasterize.
+
+        The array returned is read-only, since it may be shared.
+        """
+        key = id(block)
+        entry = self._entries.pop(key, None)
+        if entry is not None and entry[1] == block.version and \
+                entry[0]() is block:
+            self.hits += 1
+        else:
+            self.misses += 1
+            side = 2 ** (block.max_depth - block.level)
+            raster = np.empty((side, side), dtype=np.int16)
+            _paint_raster(block, raster, 0, 0, side)
+            raster.flags.writeable = False
+            if block.level != 0:
+                return raster
+            entry = (weakref.ref(block, self._remover(key)), block.version,
+                     raster)
+            if len(self._entries) >= self._capacity:
+                del self._entries[next(iter(self._entries))]
+        self._entries[key] = entry
+        return entry[2]
+
+    def _remover(self, key: int) -> Callable[[weakref.ref], None]:
+        """Return a callback that removes the entry at <key> from this cache
+        when the weak reference to its board is the one given.
+        """
+        def remove(ref: weakref.ref) -> None:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] is ref:
+                del self._entries[key]
+        return remove
+
+    def clear(self) -> None:
+        """Remove every raster from this cache and reset its counters.
+        """
+        self.hits = 0
+        self.misses = 0
+        self._entries = {}
+
+
+# The cache used by _rasterize.
+FLATTEN_CACHE = FlattenCache(8)
+
+
+def _flatten(block: Union[Block, LinearBoard]) -> \
+        List[List[Tuple[int, int, int]]]:
     """Return a two-dimensional list representing <block> as rows and columns of
     unit cells.
 
@@ -68,23 +161,125 @@ def _flatten(block: Block) -> List[List[Tuple[int, int, int]]]:
     of the block at the cell location[i][j]
 
     L[0][0] represents the unit cell in the upper left corner of the Block.
+
+    <block> may also be a LinearBoard.
+    """
+    return _columns(_rasterize(block))
+
+
+def _rasterize(block: Union[Block, LinearBoard]) -> np.ndarray:
+    """Return an array representing <block> as columns and rows of unit
+    cells, holding the palette index of the colour of each unit cell.
+
+    The array R is laid out like the list returned by _flatten: R[i][j] is the
+    palette index of the colour of the unit cell at column i and row j, and
+    R[0][0] is the unit cell in the upper left corner of the Block.
+
+    Every leaf is painted straight into the array in one walk of the tree, so
+    no unit cell blocks are ever created.
     """
-    copy = block.create_copy()
-    _smash_to_unit_cells(copy)
-    leaves = _leaves(copy)
-    leaves.sort()
-    leaves.reverse()
-    if len(leaves) == 1:
-        return [[leaves[0][1]]]
+    if isinstance(block, LinearBoard):
+        return block.rasterize()
+    return FLATTEN_CACHE.raster(block)
+
+
+# HELPER FUNCTION
+def _columns(raster: np.ndarray) -> List[List[Tuple[int, int, int]]]:
+    """Return the colours of the unit cells in <raster>, in the format
+    returned by _flatten.
+    """
+    colours = {index: palette_colour(index)
+               for index in np.unique(raster).tolist()}
+    return [[colours[index] for index in column] for column in raster.tolist()]
+
+
+# HELPER FUNCTION
+def _paint_raster(block: Block, raster: np.ndarray, column: int, row: int,
+                  width: int) -> None:
+    """Paint <block> into <raster>, where it covers the <width> by <width>
+    square of unit cells whose upper left cell is at <column> and <row>.
+    """
+    children = block.children
+    if len(children) == 0:
+        raster[column:column + width, row:row + width] = \
+            palette_index(block.colour)
+    else:
+        half = width // 2
+        _paint_raster(children[0], raster, column + half, row, half)
+        _paint_raster(children[1], raster, column, row, half)
+        _paint_raster(children[2], raster, column, row + half, half)
+        _paint_raster(children[3], raster, column + half, row + half, half)
+
+
+# HELPER FUNCTION
+def _target_cells(board: Union[Block, LinearBoard],
+                  colour: Tuple[int, int, int]) -> Optional[int]:
+    """Return the number of unit cells of <colour> on <board>, or None if
+    <board> is a LinearBoard, which does not keep colour counts.
+    """
+    if isinstance(board, LinearBoard):
+        return None
+    return board.colour_counts().get(colour, 0)
+
+
+# HELPER FUNCTION
+def _raster_perimeter_scores(raster: np.ndarray) -> \
+        Dict[Tuple[int, int, int], int]:
+    """Return the perimeter score of each colour on the board drawn in
+    <raster>, as Block.perimeter_scores does.
+    """
+    if len(raster) == 1:
+        # The only unit cell is a corner.
+        sides = np.repeat(raster[0, 0], 2)
     else:
-        flatten = []
-        for _ in range(2 ** block.max_depth):
-            column = []
-            for _ in range(2 ** block.max_depth):
-                square = leaves.pop()
-                column.append(square[1])
-            flatten.append(column)
-        return flatten
+        # Taking each side whole counts every corner twice.
+        sides = np.concatenate([raster[0], raster[-1], raster[:, 0],
+                                raster[:, -1]])
+    indices, counts = np.unique(sides, return_counts=True)
+    return {palette_colour(index): count
+            for index, count in zip(indices.tolist(), counts.tolist())}
+
+
+# HELPER FUNCTION
+def _largest_blob(target: np.ndarray) -> int:
+    """Return the number of cells in the largest 4-connected group of True
+    cells in the square boolean array <target>.
+
+    The True cells of each column are first split into runs. Runs in
+    neighbouring columns that share a row are connected, so the groups are
+    found by merging the labels of connected runs, one array operation per
+    round, rather than by visiting cells one at a time.
+    """
+    # Number the runs 1, 2, ... in the order they start, and label every
+    # cell with its run, or 0 if it is not a target cell.
+    starts = target.copy()
+    starts[:, 1:] &= ~target[:, :-1]
+    runs = np.cumsum(starts, axis=None).reshape(target.shape)
+    runs[~target] = 0
+    count = int(runs.max())
+    if count == 0:
+        return 0
+    both = target[:-1] & target[1:]
+    pairs = np.unique(runs[:-1][both] * (count + 1) + runs[1:][both])
+    left, right = pairs // (count + 1), pairs % (count + 1)
+    # Each run points at the smallest run known to be connected to it. Hook
+    # the larger of every pair of connected labels onto the smaller, then
+    # follow the pointers until every run points at its group's label.
+    parent = np.arange(count + 1)
+    while True:
+        left_root, right_root = parent[left], parent[right]
+        if np.array_equal(left_root, right_root):
+            break
+        np.minimum.at(parent, np.maximum(left_root, right_root),
+                      np.minimum(left_root, right_root))
+        while True:
+            grandparent = parent[parent]
+            if np.array_equal(grandparent, parent):
+                break
+            parent = grandparent
+    sizes = np.bincount(runs.ravel(), minlength=count + 1)
+    sizes[0] = 0
+    return int(np.bincount(parent, weights=sizes).max())
 
 
 # HELPER FUNCTION
@@ -157,6 +352,28 @@ class Goal:
         """
         raise NotImplementedError
 
+    def score_delta(self, board: Block,
+                    move: Tuple[str, Optional[int], Block]) -> Optional[int]:
+        """Return how much the score for this goal on <board> would change if
+        <move> were made, or None if <move> cannot be made.
+
+        <move> is a move as returned by Player.generate_move, on a block of
+        <board>. A paint uses this goal's colour. <board> is left as it was.
+
+        The move is made on <board> itself and undone again, rather than made
+        on a copy. Blocks keep their scores up to date, so only the moved
+        block and its ancestors are scored again, and undoing the move puts
+        back their old scores.
+        """
+        name, direction, block = move
+        before = self.score(board)
+        record = block.apply_move((name, direction), self.colour)
+        if record is None:
+            return None
+        after = self.score(board)
+        block.undo_move(record)
+        return after - before
+
     def description(self) -> str:
         """Return a description of this goal.
         """
@@ -178,18 +395,11 @@ class PerimeterGoal(Goal):
         target colour on the perimeter counts as 1 point, while corner blocks
         count as 2 points.
         """
-        flattened = _flatten(board)
-        edge = [0, (2 ** board.max_depth) - 1]
-        score = 0
-        for i in range(len(flattened)):
-            for j in range(len(flattened)):
-                if flattened[i][j] == self.colour and \
-                        ((i in edge and j not in edge) or
-                         (j in edge and i not in edge)):
-                    score += 1
-                elif flattened[i][j] == self.colour and i in edge and j in edge:
-                    score += 2
-        return score
+        if isinstance(board, LinearBoard):
+            return _raster_perimeter_scores(_rasterize(board)).get(
+                self.colour, 0)
+        else:
+            return board.perimeter_scores().get(self.colour, 0)
 
     def description(self) -> str:
         """Return a description of the goal, including the target colour."""
@@ -212,27 +422,15 @@ class BlobGoal(Goal):
         largest connected blob of the target colour counts as 1 point. A unit
         cell is connected to another if they share an edge (no corners).
         """
-        flattened = _flatten(board)
-
-        # create a visited board
-        visited = []
-        for i in range(len(flattened)):
-            column = []
-            for j in range(len(flattened)):
-                column.append(-1)
-            visited.append(column)
-
-        # check which blob has the largest size
-        largest = 0
-        for i in range(len(visited)):
-            for j in range(len(visited)):
-                curr_size = 0
-                if visited[i][j] == -1:
-                    curr_size = self._undiscovered_blob_size((i, j), flattened,
-                                                             visited)
-                if curr_size > largest:
-                    largest = curr_size
-        return largest
+        cells = _target_cells(board, self.colour)
+        if cells is not None and \
+                cells in (0, 4 ** (board.max_depth - board.level)):
+            # There is no blob at all, or the whole board is one blob.
+            return cells
+        if isinstance(board, LinearBoard):
+            return _largest_blob(_rasterize(board) ==
+                                 palette_index(self.colour))
+        return board.largest_blob(self.colour)
 
     def _undiscovered_blob_size(self, pos: Tuple[int, int],
                                 board: List[List[Tuple[int, int, int]]],
@@ -253,25 +451,28 @@ class BlobGoal(Goal):
 
         Update <visited> so that all cells that are visited are marked with
         either 0 or 1.
+
+        The search keeps its own stack of cells to visit instead of
+        recursing, so a blob may be as large as the whole board.
         """
-        if pos[0] < 0 or pos[0] >= len(board) or pos[1] < 0 or \
-                pos[1] >= len(board):
-            return 0
-        elif visited[pos[0]][pos[1]] == -1 and self.colour \
-                != board[pos[0]][pos[1]]:
-            visited[pos[0]][pos[1]] = 0
-            return 0
-        elif visited[pos[0]][pos[1]] == 1 or visited[pos[0]][pos[1]] == 0:
-            return 0
-        else:
-            curr_size = 1
-            visited[pos[0]][pos[1]] = 1
-            connected = [(pos[0], pos[1] - 1), (pos[0] + 1, pos[1]),
-                         (pos[0], pos[1] + 1), (pos[0] - 1, pos[1])]
-            for i in range(4):
-                curr_size += self._undiscovered_blob_size(connected[i], board,
-                                                          visited)
-            return curr_size
+        size = 0
+        width = len(board)
+        colour = self.colour
+        stack = [pos]
+        while len(stack) != 0:
+            x, y = stack.pop()
+            if x < 0 or x >= width or y < 0 or y >= width:
+                continue
+            column = visited[x]
+            if column[y] != -1:
+                continue
+            if board[x][y] != colour:
+                column[y] = 0
+                continue
+            column[y] = 1
+            size += 1
+            stack.extend([(x, y - 1), (x + 1, y), (x, y + 1), (x - 1, y)])
+        return size
 
     def description(self) -> str:
         """Return a description of the goal, including the target colour."""
@@ -279,12 +480,57 @@ class BlobGoal(Goal):
             colour_name(self.colour))
 
 
+def score_goals(board: Union[Block, LinearBoard], goals: List[Goal]) -> \
+        List[int]:
+    """Return the score of each goal in <goals> on <board>, in order.
+
+    Goals of the same kind share the work of scoring <board>. Every
+    PerimeterGoal reads one table of perimeter scores, and BlobGoals with the
+    same colour are only scored once. The blobs of all the BlobGoals' colours
+    are found in one walk of a Block, and a LinearBoard is rasterized once
+    for all the goals.
+    """
+    raster = _rasterize(board) if isinstance(board, LinearBoard) else None
+    perimeter_scores = None
+    blob_scores = {}
+    if raster is None:
+        # Colours with no blob at all, or whose blob is the whole board, need
+        # no walk, as in BlobGoal.score.
+        whole = 4 ** (board.max_depth - board.level)
+        walk = []
+        for goal in goals:
+            if isinstance(goal, BlobGoal) and goal.colour not in blob_scores:
+                cells = _target_cells(board, goal.colour)
+                blob_scores[goal.colour] = cells
+                if cells not in (0, whole):
+                    walk.append(goal.colour)
+        if len(walk) != 0:
+            blob_scores.update(board.largest_blobs(walk))
+    scores = []
+    for goal in goals:
+        if isinstance(goal, PerimeterGoal):
+            if perimeter_scores is None:
+                if raster is None:
+                    perimeter_scores = board.perimeter_scores()
+                else:
+                    perimeter_scores = _raster_perimeter_scores(raster)
+            scores.append(perimeter_scores.get(goal.colour, 0))
+        elif isinstance(goal, BlobGoal):
+            if goal.colour not in blob_scores:
+                blob_scores[goal.colour] = _largest_blob(
+                    raster == palette_index(goal.colour))
+            scores.append(blob_scores[goal.colour])
+        else:
+            scores.append(goal.score(board))
+    return scores
+
+
 if __name__ == '__main__':
     import python_ta
     python_ta.check_all(config={
         'allowed-import-modules': [
             'doctest', 'python_ta', 'random', 'typing', 'block', 'settings',
-            'math', '__future__'
+            'math', '__future__', 'linear_board', 'numpy', 'weakref'
         ],
         'max-attributes': 15
     })
@@ -0,0 +1,518 @@
+"""CSC148 Assignment 2
+
+=== CSC148 Winter 2020 ===
+Department of Computer Science,
+University of Toronto
+
+This code is provided solely for the personal and private use of
+students taking the CSC148 course at the University of Toronto.
+Copying for purposes other than this use is expressly prohibited.
+All forms of distribution of this code, whether as given or with
+any changes, are expressly prohibited.
+
+Authors: Diane Horton, David Liu, Mario Badr, Sophia Huynh, Misha Schwartz,
+and Jaisie Sin
+
+All of the files in this directory and all subdirectories are:
+Copyright (c) Diane Horton, David Liu, Mario Badr, Sophia Huynh,
+Misha Schwartz, and Jaisie Sin
+
+=== Module Description ===
+
+This file contains the LinearBoard class, an array-backed alternative to the
+Block tree.
+
+A LinearBoard stores only the leaves of the board, sorted in Morton (Z) order.
+The Morton code of a unit cell interleaves the bits of its column and row, so
+the cells of any block form one contiguous range of codes, and so do the
+leaves inside that block. Every operation on a block is therefore an operation
+on a slice of the leaf arrays.
+"""
+from __future__ import annotations
+from array import array
+from bisect import bisect_left, bisect_right
+from typing import Callable, List, Optional, Tuple
+import math
+import random
+
+import numpy as np
+
+from block import Block
+from settings import COLOUR_LIST, palette_index, palette_colour
+
+# A node of a LinearBoard is named by its level and the Morton code of its
+# upper-left unit cell.
+Node = Tuple[int, int]
+
+# The quadrants of a block in Morton order are upper-left, upper-right,
+# lower-left and lower-right. _Z_TO_BLOCK[d] is the index in Block.children of
+# the child in Morton quadrant d (the mapping is its own inverse).
+_Z_TO_BLOCK = (1, 0, 2, 3)
+
+
+def _interleave(x: int, y: int, depth: int) -> int:
+    """Return the Morton code of the unit cell at column <x> and row <y> of a
+    board with <depth> levels below the root.
+
+    >>> _interleave(1, 0, 1), _interleave(0, 1, 1), _interleave(3, 3, 2)
+    (1, 2, 15)
+    """
+    code = 0
+    for bit in range(depth):
+        code |= ((x >> bit) & 1) << (2 * bit)
+        code |= ((y >> bit) & 1) << (2 * bit + 1)
+    return code
+
+
+def _deinterleave(code: int, depth: int) -> Tuple[int, int]:
+    """Return the (column, row) of the unit cell with Morton code <code>.
+
+    >>> _deinterleave(_interleave(5, 2, 3), 3)
+    (5, 2)
+    """
+    x = 0
+    y = 0
+    for bit in range(depth):
+        x |= ((code >> (2 * bit)) & 1) << bit
+        y |= ((code >> (2 * bit + 1)) & 1) << bit
+    return x, y
+
+
+class LinearBoard:
+    """A Blocky board stored as a linear quadtree.
+
+    The public operations mirror those of Block (smash, swap, rotate, paint and
+    combine), with identical rules and return values, but take the Node to act
+    on as their first argument. node_at finds a Node the same way
+    player._get_block finds a Block.
+
+    === Public Attributes ===
+    position:
+        The (x, y) coordinates of the upper left corner of the board.
+    size:
+        The height and width of the board.
+    max_depth:
+        The deepest level allowed on the board.
+
+    === Representation Invariants ===
+    - len(_codes) == len(_levels) == len(_colours) >= 1
+    - _codes is sorted in increasing order and _codes[0] == 0
+    - Each leaf starts where the previous one ends, that is
+      _codes[i + 1] == _codes[i] + 4 ** (max_depth - _levels[i]).
+    - 0 <= _levels[i] <= max_depth
+    """
+    # === Private Attributes ===
+    # _codes:
+    #   The Morton code of the upper-left unit cell of each leaf.
+    # _levels:
+    #   The level of each leaf.
+    # _colours:
+    #   The index in settings.PALETTE of the colour of each leaf.
+    position: Tuple[int, int]
+    size: int
+    max_depth: int
+    _codes: array
+    _levels: bytearray
+    _colours: bytearray
+
+    def __init__(self, position: Tuple[int, int], size: int,
+                 colour: Tuple[int, int, int], max_depth: int) -> None:
+        """Initialize this board as a single, undivided block of <colour> at
+        <position> with dimensions <size> by <size>.
+
+        Preconditions:
+            - size > 0
+            - max_depth >= 0
+        """
+        self.position = position
+        self.size = size
+        self.max_depth = max_depth
+        self._codes = array('q', [0])
+        self._levels = bytearray([0])
+        self._colours = bytearray([palette_index(colour)])
+
+    @staticmethod
+    def from_block(block: Block) -> LinearBoard:
+        """Return a LinearBoard with the same leaves as <block>.
+        """
+        board = LinearBoard(block.position, block.size, (0, 0, 0),
+                            block.max_depth - block.level)
+        leaves = []
+        _collect_leaves(block, 0, 0, board.max_depth, leaves)
+        board._load(leaves)
+        return board
+
+    def to_block(self) -> Block:
+        """Return the root of a new Block tree with the same leaves as this
+        board.
+        """
+        block = Block(self.position, self.size, None, 0, self.max_depth)
+        _build_block(block, self._levels, self._colours, 0)
+        return block
+
+    def copy(self) -> LinearBoard:
+        """Return an independent copy of this board.
+        """
+        board = LinearBoard.__new__(LinearBoard)
+        board.position = self.position
+        board.size = self.size
+        board.max_depth = self.max_depth
+        board._codes = array('q', self._codes)
+        board._levels = bytearray(self._levels)
+        board._colours = bytearray(self._colours)
+        return board
+
+    def adopt_palette(self, palette: List[Tuple[int, int, int]]) -> None:
+        """Change this board's colours from indices into <palette> into
+        indices into settings.PALETTE.
+
+        A board sent to another process keeps the palette indices of the
+        process that made it, and the other process's settings.PALETTE may
+        not hold the same colours at those indices. Sending the sender's
+        palette along and calling this on arrival rebuilds the colours.
+        """
+        table = bytearray(range(256))
+        for i, colour in enumerate(palette):
+            table[i] = palette_index(colour)
+        self._colours = self._colours.translate(table)
+
+    def __eq__(self, other: LinearBoard) -> bool:
+        """Return True iff this board and <other> have the same position, size,
+        max_depth and leaves.
+        """
+        return self.position == other.position and \
+            self.size == other.size and \
+            self.max_depth == other.max_depth and \
+            self._levels == other._levels and \
+            self._colours == other._colours
+
+    def __len__(self) -> int:
+        """Return the number of leaves on this board.
+        """
+        return len(self._levels)
+
+    def _span(self, level: int) -> int:
+        """Return the number of unit cells in a block at <level>.
+        """
+        return 4 ** (self.max_depth - level)
+
+    def _range(self, node: Node) -> Tuple[int, int]:
+        """Return the slice [lo, hi) of the leaf arrays that lies inside
+        <node>.
+        """
+        level, code = node
+        lo = bisect_right(self._codes, code) - 1
+        hi = bisect_left(self._codes, code + self._span(level))
+        return lo, hi
+
+    def _is_leaf(self, node: Node) -> bool:
+        """Return True iff <node> is one of the leaves of this board.
+        """
+        lo, hi = self._range(node)
+        return hi - lo == 1 and self._levels[lo] == node[0]
+
+    def _load(self, leaves: List[Tuple[int, int, int]]) -> None:
+        """Replace the leaves of this board with <leaves>, a list of
+        (code, level, colour index) tuples in Morton order.
+        """
+        self._codes = array('q', [leaf[0] for leaf in leaves])
+        self._levels = bytearray([leaf[1] for leaf in leaves])
+        self._colours = bytearray([leaf[2] for leaf in leaves])
+
+    def _replace(self, lo: int, hi: int,
+                 leaves: List[Tuple[int, int, int]]) -> None:
+        """Replace the leaves in the slice [lo, hi) with <leaves>, a list of
+        (code, level, colour index) tuples in Morton order.
+        """
+        self._codes[lo:hi] = array('q', [leaf[0] for leaf in leaves])
+        self._levels[lo:hi] = bytearray([leaf[1] for leaf in leaves])
+        self._colours[lo:hi] = bytearray([leaf[2] for leaf in leaves])
+
+    def node_at(self, location: Tuple[int, int], level: int) -> Optional[Node]:
+        """Return the node at <level> that includes <location>. If the
+        deepest node including <location> is above <level>, return that node
+        instead, and return None if <location> is not on the board.
+
+        Rounding can make a Block one pixel wider than half of its parent, so
+        neighbouring Blocks may overlap on their last row or column of pixels.
+        Such a pixel belongs to the node whose quadrant contains it, which is
+        not always the Block that player._get_block finds there. Use
+        node_for to find the node of a given Block.
+        """
+        x, y = self.position
+        size = self.size
+        if not (x <= location[0] < x + size and y <= location[1] < y + size):
+            return None
+        column = 0
+        row = 0
+        for _ in range(self.max_depth):
+            # Halve the block the same way Block._children_positions does.
+            size = round(size / 2.0)
+            column *= 2
+            row *= 2
+            if location[0] >= x + size:
+                column += 1
+                x += size
+            if location[1] >= y + size:
+                row += 1
+                y += size
+        code = _interleave(column, row, self.max_depth)
+        leaf_level = self._levels[bisect_right(self._codes, code) - 1]
+        level = min(level, leaf_level)
+        span = self._span(level)
+        return level, code - code % span
+
+    def node_for(self, block: Block) -> Optional[Node]:
+        """Return the node covering the same square as <block>, a Block on the
+        board this LinearBoard was made from, or None if there is none.
+
+        The node is found from the path of <block> (see Block.path), so
+        unlike a pixel, it never depends on how the sizes of the blocks were
+        rounded.
+        """
+        level = block.level - (block.max_depth - self.max_depth)
+        if level < 0:
+            return None
+        path = block.path()
+        return self.node_along(path[len(path) - level:] if level else [])
+
+    def node_along(self, path: List[int]) -> Optional[Node]:
+        """Return the node reached from the root of this board by taking, at
+        each level, the child at the next index of <path> in Block.children
+        order, or None if there is no such node.
+        """
+        if len(path) > self.max_depth:
+            return None
+        code = 0
+        for depth, index in enumerate(path, 1):
+            code += _Z_TO_BLOCK[index] * self._span(depth)
+        if self._levels[bisect_right(self._codes, code) - 1] < len(path):
+            return None
+        return len(path), code
+
+    def node_position(self, node: Node) -> Tuple[int, int]:
+        """Return the pixel coordinates of the upper left corner of <node>,
+        matching the position of the corresponding Block.
+        """
+        level, code = node
+        column, row = _deinterleave(code, self.max_depth)
+        x, y = self.position
+        size = self.size
+        for bit in range(self.max_depth - 1, self.max_depth - 1 - level, -1):
+            size = round(size / 2.0)
+            x += size * ((column >> bit) & 1)
+            y += size * ((row >> bit) & 1)
+        return x, y
+
+    def node_size(self, node: Node) -> int:
+        """Return the size in pixels of <node>.
+        """
+        size = self.size
+        for _ in range(node[0]):
+            size = round(size / 2.0)
+        return size
+
+    def smash(self, node: Node) -> bool:
+        """Sub-divide <node> into four randomly generated children, as
+        Block.smash does.
+
+        The random numbers are drawn in the same order as Block.smash draws
+        them, so with the same seed both produce the same board.
+
+        Return True iff the smash was performed.
+        """
+        level, code = node
+        if level == self.max_depth or not self._is_leaf(node):
+            return False
+        lo = self._range(node)[0]
+        leaves = []
+        self._random_leaves(level, code, leaves)
+        self._replace(lo, lo + 1, leaves)
+        return True
+
+    def _random_leaves(self, level: int, code: int,
+                       leaves: List[Tuple[int, int, int]]) -> None:
+        """Append to <leaves> the leaves of four random children for the
+        block at <level> with Morton code <code>.
+        """
+        colours = [random.randint(0, len(COLOUR_LIST) - 1) for _ in range(4)]
+        span = self._span(level + 1)
+        results = []
+        for i in range(4):
+            child_code = code + _Z_TO_BLOCK[i] * span
+            child_leaves = []
+            if random.random() < math.exp(-0.25 * (level + 1)) and \
+                    level + 1 < self.max_depth:
+                self._random_leaves(level + 1, child_code, child_leaves)
+            else:
+                child_leaves.append((child_code, level + 1, colours[i]))
+            results.append(child_leaves)
+        for digit in range(4):
+            leaves.extend(results[_Z_TO_BLOCK[digit]])
+
+    def swap(self, node: Node, direction: int) -> bool:
+        """Swap the children of <node> horizontally if <direction> is 0, or
+        vertically if <direction> is 1, as Block.swap does.
+
+        Return True iff the swap was performed.
+        """
+        if self._is_leaf(node):
+            return False
+        half = 2 ** (self.max_depth - node[0] - 1)
+
+        def move(column: int, row: int, _: int) -> Tuple[int, int]:
+            if direction == 1:
+                return column, (row + half) % (2 * half)
+            return (column + half) % (2 * half), row
+
+        self._transform(node, move)
+        return True
+
+    def rotate(self, node: Node, direction: int) -> bool:
+        """Rotate <node> clockwise if <direction> is 1, or counter-clockwise
+        if <direction> is 3, as Block.rotate does.
+
+        Return True iff the rotate was performed.
+        """
+        if self._is_leaf(node):
+            return False
+        side = 2 ** (self.max_depth - node[0])
+
+        def move(column: int, row: int, width: int) -> Tuple[int, int]:
+            if direction == 1:
+                return side - row - width, column
+            return row, side - column - width
+
+        self._transform(node, move)
+        return True
+
+    def _transform(self, node: Node,
+                   move: Callable[[int, int, int], Tuple[int, int]]) -> None:
+        """Move every leaf inside <node> and restore Morton order.
+
+        <move> takes the column and row of a leaf's upper-left unit cell,
+        relative to <node>, and the leaf's width in unit cells, and returns
+        the leaf's new column and row relative to <node>.
+        """
+        lo, hi = self._range(node)
+        base_column, base_row = _deinterleave(node[1], self.max_depth)
+        leaves = []
+        for i in range(lo, hi):
+            level = self._levels[i]
+            column, row = _deinterleave(self._codes[i], self.max_depth)
+            column, row = move(column - base_column, row - base_row,
+                               2 ** (self.max_depth - level))
+            code = _interleave(base_column + column, base_row + row,
+                               self.max_depth)
+            leaves.append((code, level, self._colours[i]))
+        leaves.sort()
+        self._replace(lo, hi, leaves)
+
+    def paint(self, node: Node, colour: Tuple[int, int, int]) -> bool:
+        """Change the colour of <node> iff it is a leaf at max_depth whose
+        colour is different from <colour>, as Block.paint does.
+
+        Return True iff the colour was changed.
+        """
+        index = palette_index(colour)
+        if node[0] != self.max_depth or not self._is_leaf(node):
+            return False
+        lo = self._range(node)[0]
+        if self._colours[lo] == index:
+            return False
+        self._colours[lo] = index
+        return True
+
+    def combine(self, node: Node) -> bool:
+        """Turn <node> into a leaf of the majority colour of its children, as
+        Block.combine does.
+
+        Return True iff <node> was turned into a leaf.
+        """
+        level, code = node
+        if level != self.max_depth - 1 or self._is_leaf(node):
+            return False
+        lo, hi = self._range(node)
+        colours = list(self._colours[lo:hi])
+        majority = [colour for colour in set(colours)
+                    if colours.count(colour) >= 2]
+        if len(majority) != 1:
+            return False
+        self._replace(lo, hi, [(code, level, majority[0])])
+        return True
+
+    def rasterize(self) -> np.ndarray:
+        """Return this board as an array of the palette indices of its unit
+        cells, in the format returned by goal._rasterize.
+        """
+        side = 2 ** self.max_depth
+        raster = np.empty((side, side), dtype=np.int16)
+        for i in range(len(self._levels)):
+            width = 2 ** (self.max_depth - self._levels[i])
+            column, row = _deinterleave(self._codes[i], self.max_depth)
+            raster[column:column + width, row:row + width] = self._colours[i]
+        return raster
+
+    def to_squares(self) -> List[Tuple[Tuple[int, int, int],
+                                       Tuple[int, int], int]]:
+        """Return the squares to draw for this board, in the format returned
+        by blocky._block_to_squares.
+        """
+        squares = []
+        for i in range(len(self._levels)):
+            node = (self._levels[i], self._codes[i])
+            squares.append((palette_colour(self._colours[i]),
+                            self.node_position(node), self.node_size(node)))
+        return squares
+
+
+# HELPER FUNCTION
+def _collect_leaves(block: Block, level: int, code: int, depth: int,
+                    leaves: List[Tuple[int, int, int]]) -> None:
+    """Append to <leaves> the (code, level, colour index) of every leaf of
+    <block>, in Morton order.
+
+    <level> and <code> are the level and Morton code of <block> relative to
+    the root of the board, which has <depth> levels below it.
+    """
+    if len(block.children) == 0:
+        leaves.append((code, level, palette_index(block.colour)))
+    else:
+        span = 4 ** (depth - level - 1)
+        for digit in range(4):
+            _collect_leaves(block.children[_Z_TO_BLOCK[digit]], level + 1,
+                            code + digit * span, depth, leaves)
+
+
+# HELPER FUNCTION
+def _build_block(block: Block, levels: bytearray, colours: bytearray,
+                 i: int) -> int:
+    """Rebuild the descendants of <block> from the leaves starting at index
+    <i> of <levels> and <colours>, and return the index of the first leaf
+    that is not inside <block>.
+    """
+    if levels[i] == block.level:
+        block.colour = palette_colour(colours[i])
+        return i + 1
+    positions = block._children_positions()
+    size = block._child_size()
+    children = [None] * 4
+    for digit in range(4):
+        index = _Z_TO_BLOCK[digit]
+        child = Block(positions[index], size, None, block.level + 1,
+                      block.max_depth)
+        i = _build_block(child, levels, colours, i)
+        children[index] = child
+    block.children = children
+    return i
+
+
+if __name__ == '__main__':
+    import python_ta
+    python_ta.check_all(config={
+        'allowed-import-modules': [
+            'doctest', 'python_ta', 'random', 'typing', '__future__', 'math',
+            'array', 'bisect', 'block', 'settings', 'numpy'
+        ],
+        'max-attributes': 15
+    })
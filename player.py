@@ -22,15 +22,20 @@ Misha Schwartz, and Jaisie Sin.
 This file contains the hierarchy of player classes.
 """
 from __future__ import annotations
-from typing import List, Optional, Tuple
+from typing import Iterator, List, Optional, Tuple
+import multiprocessing
+import multiprocessing.pool
 import random
+import time
 import pygame
 
 from block import Block
 from goal import Goal, generate_goals
+from linear_board import LinearBoard, Node
+from settings import PALETTE
 
 from actions import KEY_ACTION, ROTATE_CLOCKWISE, ROTATE_COUNTER_CLOCKWISE, \
-    SWAP_HORIZONTAL, SWAP_VERTICAL, SMASH, PASS, PAINT, COMBINE
+    SWAP_HORIZONTAL, SWAP_VERTICAL, SMASH, PASS, PAINT, COMBINE, ACTION_PENALTY
 
 
 def create_players(num_human: int, num_random: int, smart_players: List[int]) \
@@ -76,17 +81,40 @@ def _get_block(block: Block, location: Tuple[int, int], level: int) -> \
     Preconditions:
         - 0 <= level <= max_depth
     """
-    if len(block.children) == 0 or level == 0:
-        if _location_in_block(block, location):
+    x, y = block.position
+    return _get_block_at(block, x, y, location, level)
+
+
+# HELPER FUNCTION
+def _get_block_at(block: Block, x: int, y: int, location: Tuple[int, int],
+                  level: int) -> Optional[Block]:
+    """Return _get_block(block, location, level), where (x, y) is the position
+    of <block>.
+
+    Only the children that could include <location> are searched, and their
+    positions are worked out from (x, y), so the search usually goes straight
+    down one path of the tree.
+    """
+    children = block.children
+    if len(children) == 0 or level == 0:
+        size = block.size
+        if x <= location[0] < x + size and y <= location[1] < y + size:
             return block
-        else:
-            return None
-    else:
-        for child in block.children:
-            block_location = _get_block(child, location, level - 1)
-            if block_location is not None:
-                return block_location
         return None
+    size = block._child_size()
+    # A child's size is rounded, so its own children can reach one unit past
+    # it, and so on for every level below it. A child cannot include
+    # <location> if <location> is out of that reach.
+    reach = size + block.max_depth - block.level - 1
+    for i, child_x, child_y in [(0, x + size, y), (1, x, y), (2, x, y + size),
+                                (3, x + size, y + size)]:
+        if child_x <= location[0] < child_x + reach and \
+                child_y <= location[1] < child_y + reach:
+            found = _get_block_at(children[i], child_x, child_y, location,
+                                  level - 1)
+            if found is not None:
+                return found
+    return None
 
 
 # HELPER FUNCTION
@@ -135,6 +163,11 @@ class Player:
         """
         raise NotImplementedError
 
+    def close(self) -> None:
+        """Release anything this player holds on to between turns, once the
+        game is over.
+        """
+
     def generate_move(self, board: Block) -> \
             Optional[Tuple[str, Optional[int], Block]]:
         """Return a potential move to make on the game board.
@@ -164,42 +197,105 @@ def _random_move_generator(block: Block, colour: Tuple[int, int, int],
     random.shuffle(moves_copy)
     i = 0
     while not valid:
-        copy_block = block.create_copy()
         potential_move = moves_copy[i]
-        if potential_move == SMASH:
-            if copy_block.smash():
-                valid = True
-                move = _create_move(SMASH, block)
-        elif potential_move == SWAP_VERTICAL:
-            if copy_block.swap(SWAP_VERTICAL[1]):
-                valid = True
-                move = _create_move(SWAP_VERTICAL, block)
-        elif potential_move == SWAP_HORIZONTAL:
-            if copy_block.swap(SWAP_HORIZONTAL[1]):
-                valid = True
-                move = _create_move(SWAP_HORIZONTAL, block)
-        elif potential_move == ROTATE_COUNTER_CLOCKWISE:
-            if copy_block.rotate(ROTATE_COUNTER_CLOCKWISE[1]):
-                valid = True
-                move = _create_move(ROTATE_COUNTER_CLOCKWISE, block)
-        elif potential_move == ROTATE_CLOCKWISE:
-            if copy_block.rotate(ROTATE_CLOCKWISE[1]):
-                valid = True
-                move = _create_move(ROTATE_CLOCKWISE, block)
-        elif potential_move == PAINT:
-            if copy_block.paint(colour):
-                valid = True
-                move = _create_move(PAINT, block)
-        elif potential_move == COMBINE:
-            if copy_block.combine():
-                valid = True
-                move = _create_move(COMBINE, block)
+        if potential_move != PASS and block.can_apply(potential_move, colour):
+            valid = True
+            move = _create_move(potential_move, block)
         i += 1
         if i >= len(moves):
             valid = True
     return move
 
 
+def legal_moves(block: Block, colour: Tuple[int, int, int],
+                moves: List[Tuple[str, Optional[int]]]) -> \
+        List[Tuple[str, Optional[int], Block]]:
+    """Return every move from <moves> that can be made on <block> or one of
+    its descendants, painting with <colour>.
+
+    The moves are listed block by block, starting with <block> and going down
+    the tree, and in the order of <moves> for each block. Whether a move can
+    be made is worked out with Block.can_apply, so <block> is never changed.
+    """
+    legal = []
+    blocks = [block]
+    while len(blocks) != 0:
+        current = blocks.pop()
+        for action in moves:
+            if current.can_apply(action, colour):
+                legal.append(_create_move(action, current))
+        blocks.extend(reversed(current.children))
+    return legal
+
+
+# HELPER FUNCTION
+def _legal_move_at(block: Block, colour: Tuple[int, int, int],
+                   moves: List[Tuple[str, Optional[int]]], index: int) -> \
+        Tuple[str, Optional[int], Block]:
+    """Return legal_moves(block, colour, moves)[index] without listing the
+    legal moves.
+
+    The move counts kept by the blocks (see Block.count_moves) show which
+    child's moves <index> falls among, so only the blocks on the path to the
+    move are looked at.
+
+    Precondition: 0 <= index < block.count_moves(moves, colour)
+    """
+    while True:
+        for action in moves:
+            if block.can_apply(action, colour):
+                if index == 0:
+                    return _create_move(action, block)
+                index -= 1
+        for child in block.children:
+            count = child.count_moves(moves, colour)
+            if index < count:
+                block = child
+                break
+            index -= count
+
+
+# HELPER FUNCTION
+def _changes_nothing(move: Tuple[str, Optional[int], Block]) -> bool:
+    """Return True if making <move> is certain to leave the board exactly as
+    it was.
+
+    This is the case for a rotation of a block whose children are leaves of
+    one colour, and for a swap of a block whose children swap places with
+    children of the same contents. Other moves that change nothing are not
+    detected.
+    """
+    name, direction, block = move
+    children = block.children
+    if len(children) == 0:
+        return False
+    elif name == ROTATE_CLOCKWISE[0]:
+        return all(len(child.children) == 0 and
+                   child.colour == children[0].colour for child in children)
+    elif name == SWAP_HORIZONTAL[0]:
+        if direction == SWAP_VERTICAL[1]:
+            pairs = [(0, 3), (1, 2)]
+        else:
+            pairs = [(0, 1), (2, 3)]
+        return all(_same_contents(children[i], children[j])
+                   for i, j in pairs)
+    return False
+
+
+# HELPER FUNCTION
+def _same_contents(block: Block, other: Block) -> bool:
+    """Return True iff <block> and <other> have the same structure, leaf
+    colours and levels, wherever they are on the board.
+    """
+    if block.zobrist_hash() != other.zobrist_hash():
+        return False
+    elif len(block.children) == 0 or len(other.children) == 0:
+        return len(block.children) == len(other.children) and \
+            block.colour == other.colour and block.level == other.level
+    return all(_same_contents(block.children[i], other.children[i])
+               for i in range(4))
+
+
 def _create_move(action: Tuple[str, Optional[int]], block: Block) -> \
         Tuple[str, Optional[int], Block]:
     """Return a tuple representing <action> made on <block>.
@@ -210,6 +306,118 @@ def _create_move(action: Tuple[str, Optional[int]], block: Block) -> \
     return action[0], action[1], block
 
 
+# HELPER FUNCTION
+def _apply_linear_move(board: LinearBoard, node: Node,
+                       action: Tuple[str, Optional[int]],
+                       colour: Tuple[int, int, int]) -> None:
+    """Perform <action> on <node> of <board>, painting with <colour> if the
+    action is PAINT.
+    """
+    if action[0] == SMASH[0]:
+        board.smash(node)
+    elif action[0] == SWAP_HORIZONTAL[0]:
+        board.swap(node, action[1])
+    elif action[0] == ROTATE_CLOCKWISE[0]:
+        board.rotate(node, action[1])
+    elif action[0] == PAINT[0]:
+        board.paint(node, colour)
+    elif action[0] == COMBINE[0]:
+        board.combine(node)
+
+
+# HELPER FUNCTION
+def _random_candidates(board: Block, colour: Tuple[int, int, int],
+                       moves: List[Tuple[str, Optional[int]]],
+                       count: Optional[int]) -> \
+        Iterator[Tuple[str, Optional[int], Block]]:
+    """Yield <count> moves drawn by _random_candidate, or keep yielding them
+    if <count> is None.
+    """
+    drawn = 0
+    while count is None or drawn < count:
+        yield _random_candidate(board, colour, moves)
+        drawn += 1
+
+
+# HELPER FUNCTION
+def _random_candidate(board: Block, colour: Tuple[int, int, int],
+                      moves: List[Tuple[str, Optional[int]]]) -> \
+        Tuple[str, Optional[int], Block]:
+    """Return a valid move from <moves> on a block of <board> found at a
+    random location and level, trying again until one is found.
+
+    Precondition: some block of <board> can make one of <moves>.
+    """
+    potential_move = None
+    while potential_move is None:
+        location_x = random.randint(board.position[0], board.position[0]
+                                    + board.size - 1)
+        location_y = random.randint(board.position[1], board.position[1]
+                                    + board.size - 1)
+        level = random.randint(0, board.max_depth)
+        block = _get_block(board, (location_x, location_y), level)
+        potential_move = _random_move_generator(block, colour, moves)
+    return potential_move
+
+
+# HELPER FUNCTION
+def _block_along(board: Block, path: List[int]) -> Block:
+    """Return the block of <board> reached by taking, at each level, the
+    child at the next index of <path>, as returned by Block.path.
+    """
+    block = board
+    for index in path:
+        block = block.children[index]
+    return block
+
+
+# HELPER FUNCTION
+def _score_candidates(job: Tuple[LinearBoard, List[Tuple[int, int, int]],
+                                 Goal, bool, int, int, int,
+                                 List[Tuple[str, Optional[int], List[int]]]]) \
+        -> Tuple[int, int]:
+    """Return the best score and the index of the first candidate with that
+    score, for a share of a SmartPlayer's candidate moves.
+
+    <job> is (board, palette, goal, linear, score, seed, start, candidates):
+    the board before any move, the settings.PALETTE its colours index into,
+    the goal to score for, whether to make the moves on copies of <board>
+    rather than on a Block built from it, the goal's score for the board, a
+    seed for the random module, the index of the first candidate and the
+    candidates themselves. Each candidate is the action's name and direction
+    and the path of the block it acts on (see Block.path).
+
+    Candidate i is scored with the random module seeded by seed + i, so the
+    smashes it makes do not depend on how the candidates are shared out. The
+    state of the random module is left as it was.
+    """
+    board, palette, goal, linear, score, seed, start, candidates = job
+    if palette != PALETTE:
+        # A worker's palette is only as new as the worker, and colours that
+        # were interned later would be missing from it.
+        board.adopt_palette(palette)
+    state = random.getstate()
+    block_board = None if linear else board.to_block()
+    best_score = None
+    best_index = -1
+    for i, (name, direction, path) in enumerate(candidates, start):
+        random.seed(seed + i)
+        if block_board is None:
+            new_copy = board.copy()
+            _apply_linear_move(new_copy, new_copy.node_along(path),
+                               (name, direction), goal.colour)
+            potential_score = goal.score(new_copy)
+        else:
+            block = _block_along(block_board, path)
+            potential_score = score + goal.score_delta(
+                block_board, (name, direction, block))
+        if best_score is None or potential_score > best_score:
+            best_score = potential_score
+            best_index = i
+    random.setstate(state)
+    return best_score, best_index
+
+
 class HumanPlayer(Player):
     """A human player.
     """
@@ -316,32 +524,76 @@ class RandomPlayer(Player):
         """Return a valid, randomly generated move.
 
         A valid move is a move other than PASS that can be successfully
-        performed on the <board>.
+        performed on the <board>. Every valid move is equally likely. If
+        there is no valid move, this player will pass.
 
         This function does not mutate <board>.
         """
         if not self._proceed:
             return None  # Do not remove
 
-        move = None
         moves = [SMASH, ROTATE_CLOCKWISE, ROTATE_COUNTER_CLOCKWISE,
                  SWAP_HORIZONTAL, SWAP_VERTICAL, COMBINE, PAINT]
-        valid = False
-        while not valid:
-            location_x = random.randint(board.position[0], board.position[0] +
-                                        board.size - 1)
-            location_y = random.randint(board.position[1], board.position[1] +
-                                        board.size - 1)
-            level = random.randint(0, board.max_depth)
-            block = _get_block(board, (location_x, location_y), level)
-            move = _random_move_generator(block, self.goal.colour, moves)
-            if move is not None:
-                valid = True
+        # Every legal move on the board is equally likely to be chosen.
+        count = board.count_moves(moves, self.goal.colour)
+        if count == 0:
+            move = (PASS[0], PASS[1], board)
+        else:
+            move = _legal_move_at(board, self.goal.colour, moves,
+                                  random.randrange(count))
 
         self._proceed = False  # Must set to False before returning!
         return move
 
 
+class SearchOptions:
+    """How a SmartPlayer searches for its moves.
+
+    === Public Attributes ===
+    linear:
+        True when candidate moves are tried out on LinearBoard copies of the
+        board instead of Block copies.
+    workers:
+        The number of processes the candidate moves are shared out among, or
+        None if they are generated and scored one at a time in this process.
+    exhaustive:
+        True when the candidate moves are distinct legal moves, all of them
+        if there are no more than the player's difficulty, rather than moves
+        drawn at random with replacement.
+    budget:
+        The number of seconds the player may spend scoring candidate moves on
+        each turn, or None if it scores as many as its difficulty however
+        long they take.
+
+    === Representation Invariants ===
+    - workers is None or workers >= 1
+    - budget is None or budget >= 0
+    - workers is None or budget is None
+    """
+    linear: bool
+    workers: Optional[int]
+    exhaustive: bool
+    budget: Optional[float]
+
+    def __init__(self, linear: bool = False, workers: Optional[int] = None,
+                 exhaustive: bool = False,
+                 budget: Optional[float] = None) -> None:
+        """Initialize these options with <linear>, <workers>, <exhaustive>
+        and <budget>.
+
+        Raise ValueError if both <workers> and <budget> are given, since
+        candidates sent to workers are drawn before any is scored, and a
+        budget leaves their number open.
+        """
+        if workers is not None and budget is not None:
+            raise ValueError('a SmartPlayer cannot have both workers and a '
+                             'budget')
+        self.linear = linear
+        self.workers = workers
+        self.exhaustive = exhaustive
+        self.budget = budget
+
+
 class SmartPlayer(Player):
     """A smart player.
 
@@ -355,20 +607,66 @@ class SmartPlayer(Player):
     # _difficulty:
     #   The number of random, valid moves the player will generate to choose
     #   from.
+    # _options:
+    #   How the player searches for its moves.
+    # _pool:
+    #   The worker processes, started on the first turn that needs them and
+    #   kept for the turns after it, or None if none are running.
+    # _saved:
+    #   The number of scorings fewer than _difficulty made on the last turn.
+    # _evaluations:
+    #   The number of candidate moves scored on each turn so far, in order.
     # == Representation Invariants concerning the private attributes ==
     #     _difficulty >= 0
+    #     0 <= _saved <= _difficulty
     _proceed: bool
     _difficulty: int
+    _options: SearchOptions
+    _pool: Optional[multiprocessing.pool.Pool]
+    _saved: int
+    _evaluations: List[int]
 
-    def __init__(self, player_id: int, goal: Goal, difficulty: int) -> None:
+    def __init__(self, player_id: int, goal: Goal, difficulty: int,
+                 options: Optional[SearchOptions] = None) -> None:
         """Initialize this SmartPlayer with the given <player_id>, <goal>
-        and <difficulty>.
+        and <difficulty>, searching for its moves as <options> say, or with
+        the default SearchOptions if <options> is None.
 
         Initialize _proceed to be False.
         """
         Player.__init__(self, player_id, goal)
         self._proceed = False
         self._difficulty = difficulty
+        self._options = SearchOptions() if options is None else options
+        self._pool = None
+        self._saved = 0
+        self._evaluations = []
+
+    def close(self) -> None:
+        """Stop this player's worker processes, if it has any running.
+
+        A player asked for another move after this starts them again.
+        """
+        if self._pool is not None:
+            self._pool.close()
+            self._pool.join()
+            self._pool = None
+
+    @property
+    def evaluations_saved(self) -> int:
+        """Return how many fewer candidate moves than this player's difficulty
+        were scored on its last turn.
+
+        Only an exhaustive SmartPlayer saves any.
+        """
+        return self._saved
+
+    @property
+    def evaluations_per_turn(self) -> List[int]:
+        """Return the number of candidate moves this player scored on each of
+        its turns so far, in order.
+        """
+        return self._evaluations[:]
 
     def get_selected_block(self, board: Block) -> Optional[Block]:
         """Return None since SmartPlayer will select a block at random when
@@ -391,49 +689,243 @@ class SmartPlayer(Player):
         performed on the <board>. If no move can be found that is better than
         the current score, this player will pass.
 
+        When this player has workers, the move chosen for a given seed of the
+        random module is the same for any number of workers.
+
+        When this player is exhaustive, every legal move is scored once if
+        there are no more than its difficulty, and otherwise that many of
+        them are picked without replacement. Moves that are certain to leave
+        the board as it is are not scored.
+
+        When this player has a budget, candidate moves are scored until the
+        budget has been used up, and the best move found so far is returned.
+        At least one candidate is scored if there is one. Unless the player is
+        exhaustive, its difficulty does not limit the number of candidates.
+
         This function does not mutate <board>.
         """
         if not self._proceed:
             return None  # Do not remove
 
-        best_score = self.goal.score(board)
+        deadline = None
+        if self._options.budget is not None:
+            deadline = time.perf_counter() + self._options.budget
+        score = self.goal.score(board)
+        best_score = score
         move = (PASS[0], PASS[1], board)
         moves = [SMASH, ROTATE_CLOCKWISE, ROTATE_COUNTER_CLOCKWISE,
                  SWAP_HORIZONTAL, SWAP_VERTICAL, COMBINE, PAINT]
-        for _ in range(self._difficulty):
-            new_copy = board.create_copy()
-            copy_block = None
-            potential_move = None
-            valid = False
-            while not valid:
-
-                location_x = random.randint(board.position[0], board.position[0]
-                                            + board.size - 1)
-                location_y = random.randint(board.position[1], board.position[1]
-                                            + board.size - 1)
-                level = random.randint(0, board.max_depth)
-                block = _get_block(board, (location_x, location_y), level)
-                copy_block = _get_block(new_copy, (location_x, location_y),
-                                        level)
-                potential_move = _random_move_generator(block, self.goal.colour,
-                                                        moves)
-                if potential_move is not None:
-                    valid = True
-            if potential_move[0] == SMASH[0]:
-                copy_block.smash()
-            elif potential_move[0] == SWAP_HORIZONTAL[0]:
-                copy_block.swap(potential_move[1])
-            elif potential_move[0] == ROTATE_CLOCKWISE[0]:
-                copy_block.rotate(potential_move[1])
-            elif potential_move == PAINT:
-                copy_block.paint(self.goal.colour)
-            elif potential_move == COMBINE:
-                copy_block.combine()
-            potential_score = self.goal.score(new_copy)
+        if self._options.exhaustive:
+            candidates = self._distinct_candidates(board, moves)
+            self._saved = self._difficulty - len(candidates)
+            if deadline is not None:
+                # The candidates scored before the deadline should be a
+                # random sample, not the ones nearest the root.
+                random.shuffle(candidates)
+        elif deadline is not None:
+            candidates = _random_candidates(board, self.goal.colour, moves,
+                                            None)
+        else:
+            candidates = _random_candidates(board, self.goal.colour, moves,
+                                            self._difficulty)
+        if self._options.workers is not None:
+            candidates = list(candidates)
+            self._evaluations.append(len(candidates))
+            move = self._pooled_move(board, score, candidates)
+            self._proceed = False  # Must set to False before returning!
+            return move
+
+        linear_board = None
+        if self._options.linear:
+            linear_board = LinearBoard.from_block(board)
+        evaluated = 0
+        for potential_move in candidates:
+            if linear_board is not None:
+                new_copy = linear_board.copy()
+                _apply_linear_move(new_copy,
+                                   new_copy.node_for(potential_move[2]),
+                                   potential_move[:2], self.goal.colour)
+                potential_score = self.goal.score(new_copy)
+            else:
+                potential_score = score + self.goal.score_delta(board,
+                                                                potential_move)
             if potential_score > best_score:
                 best_score = potential_score
                 move = potential_move
+            evaluated += 1
+            if deadline is not None and time.perf_counter() >= deadline:
+                break
+
+        self._evaluations.append(evaluated)
+        self._proceed = False  # Must set to False before returning!
+        return move
+
+    def _distinct_candidates(self, board: Block,
+                             moves: List[Tuple[str, Optional[int]]]) -> \
+            List[Tuple[str, Optional[int], Block]]:
+        """Return the legal moves from <moves> on <board> if there are no
+        more than this player's difficulty, or otherwise that many of them
+        picked at random without replacement, leaving out the moves that are
+        certain to change nothing.
+        """
+        colour = self.goal.colour
+        count = board.count_moves(moves, colour)
+        if count <= self._difficulty:
+            candidates = legal_moves(board, colour, moves)
+        else:
+            candidates = [_legal_move_at(board, colour, moves, index)
+                          for index in sorted(random.sample(range(count),
+                                                            self._difficulty))]
+        return [move for move in candidates if not _changes_nothing(move)]
+
+    def _pooled_move(self, board: Block, score: int,
+                     candidates: List[Tuple[str, Optional[int], Block]]) -> \
+            Tuple[str, Optional[int], Block]:
+        """Return the move in <candidates> with the highest score on <board>,
+        or PASS if none scores higher than <score>, having the candidates
+        scored by this player's workers.
+
+        The board is sent to each worker once, as a LinearBoard, along with
+        the palette its colours index into and a share of the candidates, and
+        each worker sends back its best score and the index of the first
+        candidate with that score. Ties go to the first candidate, as they do
+        when the candidates are scored one at a time.
+        """
+        seed = random.getrandbits(32)
+        linear_board = LinearBoard.from_block(board)
+        share = max(1, -(-len(candidates) // self._options.workers))
+        jobs = []
+        for start in range(0, len(candidates), share):
+            shared = [(name, direction, block.path())
+                      for name, direction, block
+                      in candidates[start:start + share]]
+            jobs.append((linear_board, PALETTE, self.goal, self._options.linear,
+                         score, seed, start, shared))
+        if len(jobs) > 1:
+            if self._pool is None:
+                self._pool = multiprocessing.Pool(self._options.workers)
+            results = self._pool.map(_score_candidates, jobs)
+        else:
+            results = [_score_candidates(job) for job in jobs]
 
+        move = (PASS[0], PASS[1], board)
+        best_score = score
+        for potential_score, index in results:
+            if potential_score > best_score:
+                best_score = potential_score
+                move = candidates[index]
+        return move
+
+
+class BeamPlayer(SmartPlayer):
+    """A smart player that looks more than one move ahead.
+
+    BeamPlayer plans several of its own moves in a row, ignoring the moves of
+    the other players in between. On the board each plan leads to, it scores
+    distinct legal moves the way an exhaustive SmartPlayer does, then keeps
+    only the plans with the highest score less the penalties for their
+    moves, up to its beam width. It plays the first move of the best plan.
+    """
+    # === Private Attributes ===
+    # _plies:
+    #   The number of its own moves in a row that the player plans.
+    # _beam_width:
+    #   The number of plans kept after each move of the plans.
+    # _nodes_per_second:
+    #   The number of moves scored per second on the player's last turn, or
+    #   0.0 before its first turn.
+    # == Representation Invariants concerning the private attributes ==
+    #     _plies >= 1
+    #     _beam_width >= 1
+    _plies: int
+    _beam_width: int
+    _nodes_per_second: float
+
+    def __init__(self, player_id: int, goal: Goal, difficulty: int,
+                 plies: int = 2, beam_width: int = 4) -> None:
+        """Initialize this BeamPlayer with the given <player_id>, <goal> and
+        <difficulty>, planning <plies> moves ahead and keeping <beam_width>
+        plans after each move.
+
+        <difficulty> is the largest number of moves scored on the board that
+        each plan leads to.
+
+        Initialize _proceed to be False.
+        """
+        SmartPlayer.__init__(self, player_id, goal, difficulty,
+                             SearchOptions(exhaustive=True))
+        self._plies = plies
+        self._beam_width = beam_width
+        self._nodes_per_second = 0.0
+
+    @property
+    def nodes_per_second(self) -> float:
+        """Return the number of moves this player scored per second on its
+        last turn, or 0.0 if it has not had a turn.
+        """
+        return self._nodes_per_second
+
+    def generate_move(self, board: Block) ->\
+            Optional[Tuple[str, Optional[int], Block]]:
+        """Return the first move of the plan that results in the highest
+        score for this player's goal less the penalties for the moves in it.
+
+        If no plan scores higher than the current score, this player will
+        pass.
+
+        The boards that the plans kept lead to are made from shared copies
+        of the boards of the plans they extend (see Block.create_copy), so
+        each move of a plan is made without copying the board from the root.
+
+        This function does not mutate <board>.
+        """
+        if not self._proceed:
+            return None  # Do not remove
+
+        start = time.perf_counter()
+        best_score = self.goal.score(board)
+        move = (PASS[0], PASS[1], board)
+        moves = [SMASH, ROTATE_CLOCKWISE, ROTATE_COUNTER_CLOCKWISE,
+                 SWAP_HORIZONTAL, SWAP_VERTICAL, COMBINE, PAINT]
+        # Each plan is the board it leads to, its first move, its score and
+        # the penalty for its moves.
+        plans = [(board, None, best_score, 0)]
+        nodes = 0
+        for ply in range(self._plies):
+            scored = []
+            for i, (plan_board, _, score, penalty) in enumerate(plans):
+                for candidate in self._distinct_candidates(plan_board, moves):
+                    scored.append((score - penalty -
+                                   ACTION_PENALTY[candidate[:2]] +
+                                   self.goal.score_delta(plan_board,
+                                                         candidate),
+                                   i, candidate))
+            nodes += len(scored)
+            # The sort is stable, so plans with equal scores keep the order
+            # their moves were scored in.
+            scored.sort(key=lambda plan: -plan[0])
+            if len(scored) > 0 and scored[0][0] > best_score:
+                best_score = scored[0][0]
+                move = plans[scored[0][1]][1] or scored[0][2]
+            if ply == self._plies - 1:
+                break
+
+            extended = []
+            for _, i, candidate in scored[:self._beam_width]:
+                plan_board, first, _, penalty = plans[i]
+                new_board = plan_board.create_copy(shared=True)
+                _block_along(new_board, candidate[2].path()).apply_move(
+                    candidate[:2], self.goal.colour)
+                # A smash turns out differently on the copy, so its score
+                # is worked out again.
+                extended.append((new_board, first or candidate,
+                                 self.goal.score(new_board),
+                                 penalty + ACTION_PENALTY[candidate[:2]]))
+            plans = extended
+
+        self._evaluations.append(nodes)
+        self._nodes_per_second = nodes / max(time.perf_counter() - start,
+                                             1e-9)
         self._proceed = False  # Must set to False before returning!
         return move
 
@@ -445,8 +937,9 @@ if __name__ == '__main__':
         'allowed-io': ['process_event'],
         'allowed-import-modules': [
             'doctest', 'python_ta', 'random', 'typing', 'actions', 'block',
-            'goal', 'pygame', '__future__'
+            'goal', 'pygame', '__future__', 'linear_board', 'multiprocessing',
+            'settings', 'time'
         ],
-        'max-attributes': 10,
+        'max-attributes': 11,
         'generated-members': 'pygame.*'
     })
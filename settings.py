@@ -21,7 +21,7 @@ Misha Schwartz, and Jaisie Sin.
 
 This file contains the global settings for the blocky game.
 """
-from typing import Tuple
+from typing import List, Optional, Tuple
 
 # Colours that we could use in the game
 WHITE = (255, 255, 255)
@@ -36,6 +36,12 @@ TEMPTING_TURQUOISE = (75, 196, 213)
 # A pallette of the colours we use in the game
 COLOUR_LIST = [PACIFIC_POINT, REAL_RED, OLD_OLIVE, DAFFODIL_DELIGHT]
 
+# Every colour that has been given a palette index. The first entries are
+# COLOUR_LIST, in order; any other colour is appended the first time it is
+# seen by palette_index.
+PALETTE: List[Tuple[int, int, int]] = list(COLOUR_LIST)
+_PALETTE_INDEX = {colour: i for i, colour in enumerate(PALETTE)}
+
 # The game board will be a square with this size.
 BOARD_SIZE = 750
 
@@ -77,3 +83,34 @@ def colour_name(colour: Tuple[int, int, int]) -> str:
         return colour_names[colour]
     else:
         return ''
+
+
+def palette_index(colour: Optional[Tuple[int, int, int]]) -> int:
+    """Return the index of <colour> in PALETTE, or -1 if <colour> is None.
+
+    Colours that are not yet in PALETTE are added to the end of it.
+
+    >>> palette_index(PACIFIC_POINT)
+    0
+    >>> palette_index(None)
+    -1
+    """
+    if colour is None:
+        return -1
+    index = _PALETTE_INDEX.get(colour)
+    if index is None:
+        index = len(PALETTE)
+        PALETTE.append(colour)
+        _PALETTE_INDEX[colour] = index
+    return index
+
+
+def palette_colour(index: int) -> Optional[Tuple[int, int, int]]:
+    """Return the colour at <index> in PALETTE, or None if <index> is -1.
+
+    >>> palette_colour(1) == REAL_RED
+    True
+    """
+    if index < 0:
+        return None
+    return PALETTE[index]
@@ -1,9 +1,23 @@
-from block import Block
+import gc
+import random
+import weakref
+from typing import Optional, Tuple
+import numpy as np
+import pytest
+
+from block import Block, generate_board
+from actions import ROTATE_CLOCKWISE, ROTATE_COUNTER_CLOCKWISE, \
+    SWAP_HORIZONTAL, SWAP_VERTICAL, SMASH, PAINT, COMBINE, PASS, \
+    ACTION_PENALTY
 from blocky import _block_to_squares
-from goal import generate_goals, _flatten, _leaves, _smash_to_unit_cells, \
-    PerimeterGoal, BlobGoal
-from player import _get_block, _location_in_block, create_players, Player, \
-    HumanPlayer, RandomPlayer, SmartPlayer
+from goal import generate_goals, _flatten, _leaves, _rasterize, \
+    _largest_blob, _smash_to_unit_cells, score_goals, PerimeterGoal, \
+    BlobGoal, FLATTEN_CACHE
+from linear_board import LinearBoard
+from player import _changes_nothing, _get_block, _legal_move_at, \
+    _location_in_block, create_players, legal_moves, Player, HumanPlayer, \
+    RandomPlayer, SearchOptions, SmartPlayer, BeamPlayer
+from settings import COLOUR_LIST, PALETTE, palette_index
 
 
 # TASK 2: INITIALIZE BLOCKS AND DRAW THEM --------------------------------------
@@ -36,6 +50,72 @@ def test_block_smash() -> None:
     assert b1.smash() is False
 
 
+def test_block_palette_colour() -> None:
+    """Test that Block stores colours as palette indices.
+    - colours from COLOUR_LIST and other colours both round trip
+    - a block with children has no colour
+    - blocks have no per-instance __dict__
+    """
+    b = Block((0, 0), 100, (1, 128, 181), 0, 1)
+    assert b.colour == (1, 128, 181)
+    b.colour = (0, 0, 0)
+    assert b.colour == (0, 0, 0)
+    assert b.smash()
+    assert b.colour is None
+    assert not hasattr(b, '__dict__')
+
+
+def test_linear_board() -> None:
+    """Test LinearBoard against Block.
+    - converting to and from a Block keeps the board the same
+    - each action gives the same board and return value as on a Block
+    - a copy is not changed by actions on the original
+    """
+    board = generate_board(3, 512)
+    linear = LinearBoard.from_block(board)
+    assert linear.to_block() == board
+    assert _flatten(linear) == _flatten(board)
+    copy = linear.copy()
+    for location, level in [((10, 10), 1), ((300, 40), 2), ((500, 500), 3),
+                            ((0, 0), 0), ((260, 300), 3)]:
+        block = _get_block(board, location, level)
+        node = linear.node_at(location, level)
+        assert linear.node_for(block) == node
+        assert block.rotate(1) == linear.rotate(node, 1)
+        assert block.swap(0) == linear.swap(node, 0)
+        assert block.rotate(3) == linear.rotate(node, 3)
+        assert block.swap(1) == linear.swap(node, 1)
+        assert block.paint(COLOUR_LIST[0]) == linear.paint(node, COLOUR_LIST[0])
+        assert block.combine() == linear.combine(node)
+        assert linear.to_block() == board
+    assert copy == LinearBoard.from_block(copy.to_block())
+    assert set(_block_to_squares(linear)) == \
+        set(_block_to_squares(linear.to_block()))
+
+
+def test_linear_board_node_for_rounded_sizes() -> None:
+    """Test LinearBoard.node_for on boards whose sizes are rounded.
+    - every block of the board is found, at its level and with the Morton
+      code of its upper-left unit cell, even where blocks overlap
+    - a block that is not on the LinearBoard is not found
+    """
+    random.seed(47)
+    board = generate_board(6, 47)
+    linear = LinearBoard.from_block(board)
+    blocks = [(board, 0, 0)]
+    for block, level, code in blocks:
+        assert linear.node_for(block) == (level, code)
+        span = 4 ** (6 - level - 1)
+        if len(block.children) != 0:
+            for digit, index in enumerate([1, 0, 2, 3]):
+                blocks.append((block.children[index], level + 1,
+                               code + digit * span))
+    leaf = blocks[-1][0]
+    assert leaf.smash() or leaf.level == 6
+    if len(leaf.children) != 0:
+        assert linear.node_for(leaf.children[0]) is None
+
+
 # TASK 3: THE GOAL CLASSES AND RANDOM GOALS ------------------------------------
 def test_generate_goals() -> None:
     """Test generate_goals.
@@ -89,6 +169,90 @@ def test__get_block() -> None:
     assert child.level >= 1
 
 
+def test__get_block_rounded_sizes() -> None:
+    """Test _get_block on boards whose block sizes are rounded, so that
+    children can reach past their parent or leave a gap in it.
+    - every location the board reaches, at every level, gives the block a
+      search of every child in order finds
+    """
+
+    def search(block: Block, location: Tuple[int, int], level: int) -> \
+            Optional[Block]:
+        if len(block.children) == 0 or level == 0:
+            return block if _location_in_block(block, location) else None
+        for child in block.children:
+            found = search(child, location, level - 1)
+            if found is not None:
+                return found
+        return None
+
+    random.seed(148)
+    for size in [25, 47]:
+        board = generate_board(4, size)
+        board.children[0].rotate(1)
+        for x in range(-1, size + 5):
+            for y in range(-1, size + 5):
+                for level in range(5):
+                    assert _get_block(board, (x, y), level) is \
+                        search(board, (x, y), level)
+
+
+def test_legal_moves() -> None:
+    """Test legal_moves.
+    - a leaf at max_depth can only be painted, with a different colour
+    - every move listed can be made, and every block of a random board
+      gets each move it can make listed once
+    - the board is not changed
+    """
+    moves = [SMASH, ROTATE_CLOCKWISE, ROTATE_COUNTER_CLOCKWISE,
+             SWAP_HORIZONTAL, SWAP_VERTICAL, COMBINE, PAINT]
+    leaf = Block((0, 0), 512, COLOUR_LIST[0], 0, 0)
+    assert legal_moves(leaf, COLOUR_LIST[0], moves) == []
+    assert legal_moves(leaf, COLOUR_LIST[1], moves) == [('paint', None, leaf)]
+    random.seed(148)
+    board = generate_board(4, 512)
+    original = board.create_copy()
+    listed = legal_moves(board, COLOUR_LIST[2], moves)
+    assert board == original
+    blocks = [board]
+    for block in blocks:
+        blocks.extend(block.children)
+        for action in moves:
+            count = sum(1 for move in listed
+                        if move[:2] == action and move[2] is block)
+            assert count == int(block.can_apply(action, COLOUR_LIST[2]))
+    assert len(listed) == sum(block.can_apply(action, COLOUR_LIST[2])
+                              for block in blocks for action in moves)
+
+
+def test_block_count_moves() -> None:
+    """Test Block.count_moves and _legal_move_at.
+    - the count matches legal_moves, before and after moves are made and
+      undone
+    - each index picks out the move legal_moves lists at that index
+    - a RandomPlayer passes when no move is legal
+    """
+    moves = [SMASH, ROTATE_CLOCKWISE, ROTATE_COUNTER_CLOCKWISE,
+             SWAP_HORIZONTAL, SWAP_VERTICAL, COMBINE, PAINT]
+    colour = COLOUR_LIST[1]
+    random.seed(21)
+    board = generate_board(4, 512)
+    for _ in range(20):
+        listed = legal_moves(board, colour, moves)
+        assert board.count_moves(moves, colour) == len(listed)
+        for index, move in enumerate(listed):
+            assert _legal_move_at(board, colour, moves, index) == move
+        name, direction, block = random.choice(listed)
+        record = block.apply_move((name, direction), colour)
+        if random.random() < 0.3:
+            block.undo_move(record)
+    leaf = Block((0, 0), 512, COLOUR_LIST[0], 0, 0)
+    assert leaf.count_moves(moves, COLOUR_LIST[0]) == 0
+    player = RandomPlayer(0, PerimeterGoal(COLOUR_LIST[0]))
+    player._proceed = True
+    assert player.generate_move(leaf)[:2] == PASS
+
+
 def test_create_players() -> None:
     """Test create_players.
     - test order is correct
@@ -133,9 +297,9 @@ def test_block__update_children_positions() -> None:
     assert b1.children[1].position == (150, 75)
     assert b1.children[2].position == (150, 125)
     assert b1.children[3].position == (200, 125)
-    # CHILDREN WITH CHILDREN (can fail based on chance of the block not creating
-    # any children)
+    # CHILDREN WITH CHILDREN (seeded so that the first child is smashed too)
     block._update_children_positions((50, 50))
+    random.seed(148)
     assert block.smash()
     block._update_children_positions((80, 0))
     assert block.children[0].children[0].position == (155, 0)
@@ -144,6 +308,54 @@ def test_block__update_children_positions() -> None:
     assert block.children[0].children[3].position == (155, 25)
 
 
+def test_block_derived_positions() -> None:
+    """Test that children derive their positions from their parents.
+    - appended children follow their parent when it is reordered
+    - moving a block moves its descendants
+    - blocks removed by combine keep their positions
+    """
+    block = Block((0, 0), 100, None, 0, 2)
+    block.children = []
+    for position in block._children_positions():
+        block.children.append(Block(position, 50, (0, 0, 0), 1, 2))
+    top_right = block.children[0]
+    assert block.swap(0)
+    assert top_right.position == (0, 0)
+    assert block.rotate(3)
+    assert top_right.position == (0, 50)
+    block._update_children_positions((100, 100))
+    assert top_right.position == (100, 150)
+    child = block.children[1]
+    assert child.smash()
+    grandchild = child.children[0]
+    assert grandchild.position == (125, 100)
+    for grandchild_block in child.children:
+        grandchild_block.colour = (0, 0, 0)
+    assert child.combine()
+    assert grandchild.position == (125, 100)
+
+
+def test_block_given_positions() -> None:
+    """Test blocks with parents that were given positions of their own.
+    - a child given its own position moves with a rotation of its parent
+    - a grandchild given its own position moves with a swap of its
+      grandparent
+    """
+    board = Block((0, 0), 512, None, 0, 2)
+    board.children = [Block(position, 256, COLOUR_LIST[0], 1, 2)
+                      for position in board._children_positions()]
+    child = board.children[0]
+    child.position = child.position
+    assert board.rotate(1)
+    assert child.position == (256, 256)
+    assert board.children[1].smash()
+    grandchild = board.children[1].children[3]
+    grandchild.position = grandchild.position
+    assert grandchild.position == (128, 128)
+    assert board.swap(0)
+    assert grandchild.position == (384, 128)
+
+
 def test_block_swap() -> None:
     """Test Block.swap.
     - vertical (test in game)
@@ -191,6 +403,248 @@ def test_block_rotate() -> None:
     assert block.children[3].colour == (199, 44, 58)
 
 
+def test_block_rotate_lazy() -> None:
+    """Test that pending rotations are applied before blocks are read.
+    - a block held from before its ancestor was rotated moves with it
+    - rotating four times gives back the original board
+    - changing a held block after its ancestor was rotated
+    """
+    board = Block((0, 0), 512, None, 0, 2)
+    board.children = []
+    for i in range(4):
+        board.children.append(Block(board._children_positions()[i], 256,
+                                    COLOUR_LIST[i], 1, 2))
+    board.children[0].smash()
+    original = board.create_copy()
+    linear = LinearBoard.from_block(board)
+    top_right = board.children[0]
+    held = top_right.children[1]
+    assert held.position == (256, 0)
+    assert board.rotate(1) and board.rotate(1)
+    assert held.position == (128, 384)
+    assert board.rotate(3) and board.rotate(3)
+    assert board == original
+    assert board.rotate(1)
+    assert linear.rotate(linear.node_at((0, 0), 0), 1)
+    assert held.paint(COLOUR_LIST[3]) == \
+        linear.paint(linear.node_at(held.position, 2), COLOUR_LIST[3])
+    assert top_right.swap(0)
+    assert linear.swap(linear.node_at((256, 256), 1), 0)
+    assert LinearBoard.from_block(board) == linear
+
+
+def test_block_children_list() -> None:
+    """Test changing a Block's list of children in place.
+    - after reverse, the score and hash match a board built from scratch
+    - after pop, the hash changes, and the removed child keeps its position
+    - appending the child again restores the hash and the score
+    - leaves share no list, but a list read from a leaf can be added to
+    """
+    random.seed(3)
+    board = generate_board(3, 512)
+    goal = PerimeterGoal(COLOUR_LIST[0])
+    original_hash = board.zobrist_hash()
+    original_score = goal.score(board)
+    board.children.reverse()
+    rebuilt = LinearBoard.from_block(board).to_block()
+    assert board.zobrist_hash() == rebuilt.zobrist_hash() != original_hash
+    assert goal.score(board) == goal.score(rebuilt)
+    board.children.reverse()
+    assert board.zobrist_hash() == original_hash
+    position = board.children[3].position
+    child = board.children.pop()
+    assert board.zobrist_hash() != original_hash
+    assert child.position == position
+    board.children.append(child)
+    assert board.zobrist_hash() == original_hash
+    assert goal.score(board) == original_score
+    leaf = Block((0, 0), 512, COLOUR_LIST[0], 0, 1)
+    assert leaf.children == [] and leaf._children == ()
+    leaf.children.append(Block((256, 0), 256, COLOUR_LIST[1], 1, 1))
+    assert len(leaf.children) == 1 and leaf.children[0].position == (256, 0)
+
+
+def test_block_shared_copy() -> None:
+    """Test Block.create_copy with shared=True.
+    - the copy equals a deep copy, and is not an alias
+    - changing the copy does not change the original, or the other way around
+    - a pending rotation in the original is included in the copy
+    - copying an unchanged board again shares the same snapshot
+    """
+    random.seed(148)
+    board = generate_board(3, 512)
+    board.rotate(1)
+    deep = board.create_copy()
+    shared = board.create_copy(shared=True)
+    assert shared == deep and shared is not board
+    assert shared.children[0] is not board.children[0]
+    block = shared.children[1]
+    while len(block.children) != 0:
+        block = block.children[2]
+    assert block.smash() or block.paint(COLOUR_LIST[0]) or \
+        block._parent.rotate(3)
+    assert board == deep and shared != deep
+    board.children[0].swap(1)
+    assert shared != board
+    assert board.create_copy(shared=True) == board
+    assert board._snapshot() is board.create_copy(shared=True)._frozen
+
+
+def test_block_apply_undo_move() -> None:
+    """Test Block.apply_move and Block.undo_move.
+    - each kind of move, undone in reverse order, gives back the board
+    - undoing a combine puts back the same children
+    - a move that cannot be performed returns None
+    """
+    board = Block((0, 0), 512, None, 0, 2)
+    board.children = []
+    for i in range(4):
+        board.children.append(Block(board._children_positions()[i], 256,
+                                    COLOUR_LIST[i], 1, 2))
+    block = board.children[0]
+    block.smash()
+    for i in range(4):
+        block.children[i].colour = COLOUR_LIST[max(i - 1, 0)]
+    children = block.children[:]
+    original = board.create_copy()
+    records = []
+    for action in [('rotate', 1), ('swap', 0), ('rotate', 3), ('swap', 1),
+                   ('combine', None), ('smash', None)]:
+        records.append((block, block.apply_move(action)))
+    records.append((block.children[0],
+                    block.children[0].apply_move(('paint', None),
+                                                 COLOUR_LIST[3])))
+    assert None not in [record for _, record in records]
+    assert board != original
+    assert board.children[1].apply_move(('paint', None), COLOUR_LIST[0]) \
+        is None
+    for target, record in reversed(records):
+        target.undo_move(record)
+    assert board == original
+    assert all(block.children[i] is children[i] for i in range(4))
+
+
+def test_block_can_apply() -> None:
+    """Test Block.can_apply.
+    - each kind of move gives True iff apply_move performs it, on every
+      block of random boards
+    - a combine with tied colours cannot be made
+    """
+    actions = [('rotate', 1), ('rotate', 3), ('swap', 0), ('swap', 1),
+               ('smash', None), ('paint', None), ('combine', None),
+               ('pass', None)]
+    random.seed(148)
+    for _ in range(10):
+        board = generate_board(3, 512)
+        blocks = [board]
+        for block in blocks:
+            blocks.extend(block.children)
+            for action in actions:
+                possible = block.can_apply(action, COLOUR_LIST[0])
+                record = block.apply_move(action, COLOUR_LIST[0])
+                assert possible == (record is not None)
+                if record is not None:
+                    block.undo_move(record)
+    block = Block((0, 0), 512, COLOUR_LIST[0], 0, 1)
+    assert block.smash()
+    for i in range(4):
+        block.children[i].colour = COLOUR_LIST[i % 2]
+    assert block.can_apply(('combine', None)) is False
+
+
+def test_block_zobrist_hash() -> None:
+    """Test Block.zobrist_hash.
+    - equal boards have equal hashes, wherever they are
+    - a move changes the hash, and undoing it gives back the old hash
+    - the hash kept up to date through moves matches a freshly built board
+    """
+    random.seed(148)
+    board = generate_board(4, 512)
+    linear = LinearBoard.from_block(board)
+    assert board.zobrist_hash() == linear.to_block().zobrist_hash()
+    copy = board.create_copy()
+    copy.position = (100, 100)
+    assert copy.zobrist_hash() == board.zobrist_hash()
+    original = board.zobrist_hash()
+    held = board.children[2]
+    assert board.rotate(1)
+    assert board.zobrist_hash() != original
+    assert held.swap(0) and linear.rotate(linear.node_at((0, 0), 0), 1)
+    assert linear.swap(linear.node_at(held.position, 1), 0)
+    assert board.zobrist_hash() == linear.to_block().zobrist_hash()
+    assert held.swap(0) and board.rotate(3)
+    assert board.zobrist_hash() == original
+
+
+def test_block_colour_counts() -> None:
+    """Test Block.colour_counts.
+    - the counts match the flattened board
+    - a held block's counts do not change when its ancestor rotates
+    - the counts follow paint, combine and smash
+    """
+    board = Block((0, 0), 512, None, 0, 2)
+    board.children = []
+    for i in range(4):
+        board.children.append(Block(board._children_positions()[i], 256,
+                                    COLOUR_LIST[i], 1, 2))
+    held = board.children[0]
+    held.smash()
+    for i in range(4):
+        held.children[i].colour = COLOUR_LIST[i // 2]
+
+    def flat_counts() -> dict:
+        counts = {}
+        for column in _flatten(board):
+            for colour in column:
+                counts[colour] = counts.get(colour, 0) + 1
+        return counts
+
+    assert board.colour_counts() == flat_counts()
+    assert held.colour_counts() == {COLOUR_LIST[0]: 2, COLOUR_LIST[1]: 2}
+    assert board.rotate(1)
+    assert held.colour_counts() == {COLOUR_LIST[0]: 2, COLOUR_LIST[1]: 2}
+    assert held.children[0].paint(COLOUR_LIST[3])
+    assert board.colour_counts() == flat_counts()
+    assert held.combine()
+    assert board.colour_counts() == flat_counts()
+    assert board.children[2].smash()
+    assert board.colour_counts() == flat_counts()
+
+
+def test_block_perimeter_scores() -> None:
+    """Test Block.perimeter_scores.
+    - the scores match PerimeterGoal on a LinearBoard copy of the board
+    - the scores follow rotate, swap, paint, smash and combine on a block
+      held while its ancestors change
+    - a held block's scores do not change when its ancestor rotates
+    """
+    random.seed(148)
+    board = generate_board(4, 512)
+
+    def check() -> None:
+        linear = LinearBoard.from_block(board)
+        scores = board.perimeter_scores()
+        for colour in COLOUR_LIST:
+            assert scores.get(colour, 0) == \
+                PerimeterGoal(colour).score(linear)
+
+    check()
+    held = board.children[1]
+    held.smash()
+    scores = held.perimeter_scores()
+    for move in [('rotate', 1), ('swap', 0), ('rotate', 3), ('swap', 1)]:
+        assert board.apply_move(move) is not None
+        check()
+        assert held.perimeter_scores() == scores
+    for move in [('rotate', 1), ('swap', 1), ('smash', None),
+                 ('paint', None), ('combine', None)]:
+        block = held
+        while len(block.children) != 0 and block.level < 3:
+            block = block.children[1]
+        block.apply_move(move, COLOUR_LIST[2])
+        check()
+
+
 def test_block_paint() -> None:
     """Test Block.paint.
     - leaf
@@ -274,6 +728,60 @@ def test__flatten() -> None:
                              [b1.children[0].colour, b1.children[3].colour]]
 
 
+def test__rasterize() -> None:
+    """Test _rasterize.
+    - a leaf larger than a unit cell fills its whole square
+    - the array holds palette indices laid out like _flatten
+    - a LinearBoard gives the same array
+    """
+    random.seed(148)
+    board = generate_board(4, 512)
+    raster = _rasterize(board)
+    assert raster.shape == (16, 16)
+    assert [[COLOUR_LIST[index] for index in column]
+            for column in raster.tolist()] == _flatten(board)
+    assert (LinearBoard.from_block(board).rasterize() == raster).all()
+    leaf = Block((0, 0), 100, COLOUR_LIST[2], 1, 3)
+    assert (_rasterize(leaf) == 2).all() and _rasterize(leaf).shape == (4, 4)
+    assert PerimeterGoal(COLOUR_LIST[2]).score(leaf) == 16
+    assert BlobGoal(COLOUR_LIST[2]).score(leaf) == 16
+
+
+def test_flatten_cache() -> None:
+    """Test FLATTEN_CACHE and Block.version.
+    - flattening an unchanged board again is a hit
+    - a change anywhere in the board changes its version and is a miss
+    - a block inside the board is not cached
+    - the cache does not keep a board alive, and drops its raster once the
+      board is gone
+    """
+    random.seed(148)
+    board = generate_board(3, 512)
+    FLATTEN_CACHE.clear()
+    raster = _rasterize(board)
+    assert _rasterize(board) is raster
+    assert _flatten(board) == [[COLOUR_LIST[index] for index in column]
+                               for column in raster.tolist()]
+    assert (FLATTEN_CACHE.hits, FLATTEN_CACHE.misses) == (2, 1)
+    version = board.version
+    block = board
+    while len(block.children) != 0:
+        block = block.children[0]
+    assert block.smash() or block.paint(COLOUR_LIST[1]) or \
+        block.paint(COLOUR_LIST[2])
+    assert board.version != version
+    assert _flatten(board) == _flatten(board.create_copy())
+    assert (FLATTEN_CACHE.hits, FLATTEN_CACHE.misses) == (2, 3)
+    _rasterize(board.children[0])
+    _rasterize(board.children[0])
+    assert FLATTEN_CACHE.misses == 5
+    gone = weakref.ref(board)
+    del board, block
+    gc.collect()
+    assert gone() is None
+    assert FLATTEN_CACHE._entries == {}
+
+
 def test__leaves_helper() -> None:
     """Test helper function _leaves."""
     block = Block((0, 0), 100, (1, 128, 181), 0, 2)
@@ -319,6 +827,25 @@ def test__smash_to_unit_cells() -> None:
     assert len(_leaves(b1)) == 64
 
 
+def test_perimetergoal_score() -> None:
+    """Test PerimeterGoal.score.
+    - a board that is a single unit cell scores 2
+    - a leaf spanning many unit cells scores each side it touches
+    - the scores kept by the board match scoring the whole raster
+    """
+    cell = Block((0, 0), 100, COLOUR_LIST[1], 2, 2)
+    assert PerimeterGoal(COLOUR_LIST[1]).score(cell) == 2
+    leaf = Block((0, 0), 100, COLOUR_LIST[1], 0, 2)
+    assert PerimeterGoal(COLOUR_LIST[1]).score(leaf) == 16
+    random.seed(148)
+    for _ in range(20):
+        board = generate_board(4, 512)
+        linear = LinearBoard.from_block(board)
+        for colour in COLOUR_LIST:
+            goal = PerimeterGoal(colour)
+            assert goal.score(board) == goal.score(linear)
+
+
 # TASK 7: IMPLEMENT SCORING FOR BLOB GOAL --------------------------------------
 # check BlobGoal.score in the game
 def test_blobgoal__undiscovered_blob_size() -> None:
@@ -339,10 +866,377 @@ def test_blobgoal__undiscovered_blob_size() -> None:
     assert visited == [[1, 0], [1, 0]]
 
 
+def test_blobgoal_score_deep_board() -> None:
+    """Test BlobGoal.score on a board too deep to search recursively.
+    - a blob of every unit cell but one on a depth 7 board
+    """
+    board = Block((0, 0), 512, COLOUR_LIST[0], 0, 7)
+    block = board
+    while block.level < 7:
+        positions = block._children_positions()
+        block.colour = None
+        block.children = [Block(positions[i], block._child_size(),
+                                COLOUR_LIST[0], block.level + 1, 7)
+                          for i in range(4)]
+        block = block.children[0]
+    block.colour = COLOUR_LIST[1]
+    assert BlobGoal(COLOUR_LIST[0]).score(board) == 4 ** 7 - 1
+
+
+def test__largest_blob() -> None:
+    """Test _largest_blob.
+    - no target cells
+    - a snake whose runs only join through a long chain of merges
+    - the sizes found by BlobGoal._undiscovered_blob_size on random boards
+    """
+    assert _largest_blob(np.zeros((4, 4), dtype=bool)) == 0
+    snake = np.zeros((7, 7), dtype=bool)
+    snake[::2, :] = True
+    snake[1::4, 6] = True
+    snake[3::4, 0] = True
+    assert _largest_blob(snake) == int(snake.sum())
+    random.seed(148)
+    for _ in range(10):
+        board = generate_board(5, 512)
+        for colour in COLOUR_LIST:
+            goal = BlobGoal(colour)
+            flattened = _flatten(board)
+            visited = [[-1] * 32 for _ in range(32)]
+            largest = max(goal._undiscovered_blob_size((i, j), flattened,
+                                                       visited)
+                          for i in range(32) for j in range(32))
+            target = _rasterize(board) == palette_index(colour)
+            assert _largest_blob(target) == largest
+
+
+def test_block_largest_blob() -> None:
+    """Test Block.largest_blob.
+    - a leaf that is the whole board
+    - leaves of different sizes that only share part of an edge
+    - the sizes found on the unit cells of random boards
+    - the sizes follow moves on blocks held while their ancestors change
+    """
+    assert Block((0, 0), 512, COLOUR_LIST[0], 0, 3).largest_blob(
+        COLOUR_LIST[0]) == 64
+    board = Block((0, 0), 512, COLOUR_LIST[1], 0, 3)
+    assert board.smash()
+    for child in board.children:
+        child.children = []
+        child.colour = COLOUR_LIST[1]
+    assert board.children[0].smash()
+    for i in range(4):
+        board.children[0].children[i].children = []
+        board.children[0].children[i].colour = COLOUR_LIST[i % 2]
+    board.children[1].colour = COLOUR_LIST[0]
+    # The upper left quarter touches one of the upper right's children.
+    assert board.largest_blob(COLOUR_LIST[0]) == 16 + 4
+
+    def check() -> None:
+        for colour in COLOUR_LIST:
+            target = _rasterize(board) == palette_index(colour)
+            assert board.largest_blob(colour) == _largest_blob(target)
+
+    random.seed(148)
+    moves = [('rotate', 1), ('rotate', 3), ('swap', 0), ('swap', 1),
+             ('smash', None), ('paint', None), ('combine', None)]
+    for _ in range(10):
+        board = generate_board(5, 512)
+        check()
+        held = [board]
+        for _ in range(10):
+            block = random.choice(held)
+            while len(block.children) != 0 and random.random() < 0.7:
+                block = random.choice(block.children)
+            held.append(block)
+            block.apply_move(random.choice(moves), random.choice(COLOUR_LIST))
+            check()
+
+
+def test_block_kept_caches() -> None:
+    """Test what Blocks keep of what they work out about their contents.
+    - leaves keep nothing
+    - only blocks far enough above max_depth keep blobs
+    - a swap keeps the counts of its ancestors, and drops what depends on
+      where the unit cells are
+    """
+    random.seed(148)
+    board = generate_board(5, 512)
+    for colour in COLOUR_LIST:
+        board.largest_blob(colour)
+    board.zobrist_hash()
+    board.colour_counts()
+    board.perimeter_scores()
+    board.count_moves([('smash', None)])
+    blocks = [board]
+    for block in blocks:
+        blocks.extend(block.children)
+        if len(block.children) == 0:
+            assert block._cache is None
+        elif block.level > block.max_depth - 2:
+            assert block._cache is None or block._cache.blobs is None
+    assert len(board._cache.blobs) == len(COLOUR_LIST)
+    parent = [block for block in blocks if len(block.children) != 0][-1]
+    assert parent.swap(0)
+    assert board._cache.counts is not None
+    assert board._cache.moves is not None
+    assert board._cache.hashes is None and board._cache.blobs is None
+
+
+def test_block_largest_blobs() -> None:
+    """Test Block.largest_blobs.
+    - no colours
+    - every colour at once matches largest_blob, on fresh boards and after
+      moves, with the blobs of some colours already found
+    """
+    assert Block((0, 0), 512, COLOUR_LIST[0], 0, 3).largest_blobs([]) == {}
+    random.seed(148)
+    moves = [('rotate', 1), ('rotate', 3), ('swap', 0), ('swap', 1),
+             ('smash', None), ('paint', None), ('combine', None)]
+    for _ in range(10):
+        board = generate_board(5, 512)
+        for _ in range(5):
+            expected = {colour: board.create_copy().largest_blob(colour)
+                        for colour in COLOUR_LIST}
+            board.largest_blob(random.choice(COLOUR_LIST))
+            assert board.largest_blobs(COLOUR_LIST) == expected
+            block = board
+            while len(block.children) != 0 and random.random() < 0.7:
+                block = random.choice(block.children)
+            block.apply_move(random.choice(moves), random.choice(COLOUR_LIST))
+
+
+def test_score_goals() -> None:
+    """Test score_goals.
+    - no goals
+    - every kind of goal and colour, some repeated, on Blocks and on
+      LinearBoards, matches scoring each goal on its own
+    """
+    board = generate_board(1, 512)
+    assert score_goals(board, []) == []
+    random.seed(148)
+    goals = [PerimeterGoal(colour) for colour in COLOUR_LIST] + \
+        [BlobGoal(colour) for colour in COLOUR_LIST]
+    goals += goals[::3]
+    for depth in range(4):
+        board = generate_board(depth, 512)
+        linear = LinearBoard.from_block(board)
+        for scored in [board, linear]:
+            assert score_goals(scored, goals) == \
+                [goal.score(scored) for goal in goals]
+
+
+def test_goal_score_delta() -> None:
+    """Test Goal.score_delta.
+    - a move that cannot be made gives None
+    - the change matches scoring a copy with the move made on it, for each
+      kind of goal and move, with smashes given the same random children
+    - some smashes change the score
+    - the board is left as it was
+    """
+    board = Block((0, 0), 512, COLOUR_LIST[0], 0, 2)
+    assert PerimeterGoal(COLOUR_LIST[0]).score_delta(
+        board, ('rotate', 1, board)) is None
+    random.seed(148)
+    moves = [('rotate', 1), ('rotate', 3), ('swap', 0), ('swap', 1),
+             ('smash', None), ('paint', None), ('combine', None)]
+    smash_deltas = []
+    for _ in range(10):
+        board = generate_board(4, 512)
+        for goal in [PerimeterGoal(COLOUR_LIST[1]), BlobGoal(COLOUR_LIST[2])]:
+            for name, direction in moves:
+                block = _get_block(board, (random.randint(0, 511),
+                                           random.randint(0, 511)),
+                                   random.randint(0, 4))
+                original = board.create_copy()
+                state = random.getstate()
+                delta = goal.score_delta(board, (name, direction, block))
+                assert board == original
+                copy = _get_block(original, block.position, block.level)
+                random.setstate(state)
+                if copy.apply_move((name, direction), goal.colour) is None:
+                    assert delta is None
+                else:
+                    assert delta == goal.score(original) - goal.score(board)
+                    if name == 'smash':
+                        smash_deltas.append(delta)
+    assert any(delta != 0 for delta in smash_deltas)
+
+
 # TASK 8: ADD RANDOM PLAYERS ---------------------------------------------------
 
 
 # TASK 9: ADD SMART PLAYERS ----------------------------------------------------
+def test_smart_player_workers() -> None:
+    """Test SmartPlayer with workers.
+    - for the same seed, the move chosen and the state of the random module
+      afterwards are the same for 1, 2 and 3 workers, on Blocks and on
+      LinearBoards, including boards whose block sizes are rounded
+    - the same workers are used on every turn, and scoring goes on in this
+      process once they are closed
+    - the board is not changed
+    """
+    goal = BlobGoal(COLOUR_LIST[0])
+    players = [SmartPlayer(0, goal, 30, SearchOptions(linear, workers))
+               for linear in [False, True] for workers in [1, 2, 3]]
+    assert all(player._pool is None for player in players)
+    pools = None
+    for depth, size in [(3, 512), (6, 47)]:
+        random.seed(22)
+        board = generate_board(depth, size)
+        original = board.create_copy()
+        chosen = []
+        for player in players:
+            player._proceed = True
+            random.seed(148)
+            name, direction, block = player.generate_move(board)
+            chosen.append((name, direction, block.path(), random.random()))
+        assert chosen[:3] == [chosen[0]] * 3
+        assert chosen[3:] == [chosen[3]] * 3
+        assert board == original
+        if pools is None:
+            pools = [player._pool for player in players]
+    assert [pool is None for pool in pools] == [True, False, False] * 2
+    assert [player._pool for player in players] == pools
+    for player in players:
+        player.close()
+        assert player._pool is None
+    players[1]._proceed = True
+    random.seed(148)
+    assert players[1].generate_move(board)[2].path() == chosen[1][2]
+
+
+def test_smart_player_workers_new_colour() -> None:
+    """Test SmartPlayer with workers on a board with a colour that was first
+    used after the workers started.
+    - the move chosen is the same as with a single worker, which scores in
+      this process, on Blocks and on LinearBoards
+    """
+    colour = (0, 0, 0)
+    while colour in PALETTE:
+        colour = (colour[0] + 1, 0, 0)
+    goal = BlobGoal(COLOUR_LIST[0])
+    for linear in [False, True]:
+        player = SmartPlayer(0, goal, 30, SearchOptions(linear, 2))
+        board = generate_board(3, 512)
+        player._proceed = True
+        player.generate_move(board)
+        leaf = board
+        while len(leaf.children) != 0:
+            leaf = leaf.children[0]
+        leaf.colour = colour
+        chosen = []
+        for workers in [2, 1]:
+            player._options.workers = workers
+            player._proceed = True
+            random.seed(148)
+            name, direction, block = player.generate_move(board)
+            chosen.append((name, direction, block.path()))
+        player.close()
+        assert chosen[0] == chosen[1]
+
+
+def test_smart_player_exhaustive() -> None:
+    """Test an exhaustive SmartPlayer.
+    - rotating or swapping a block of four equal leaves is not scored, so a
+      player of difficulty 100 scores only the combine and saves 99
+    - on a small board every legal move that changes the board is scored
+      once
+    - on a large board the candidates are distinct legal moves, no more than
+      the difficulty
+    """
+    board = Block((0, 0), 512, COLOUR_LIST[0], 0, 1)
+    board.children = [Block(position, 256, COLOUR_LIST[0], 1, 1)
+                      for position in board._children_positions()]
+    player = SmartPlayer(0, PerimeterGoal(COLOUR_LIST[0]), 100,
+                         SearchOptions(exhaustive=True))
+    player._proceed = True
+    assert player.generate_move(board)[:2] == PASS
+    assert player.evaluations_saved == 99
+    moves = [SMASH, ROTATE_CLOCKWISE, ROTATE_COUNTER_CLOCKWISE,
+             SWAP_HORIZONTAL, SWAP_VERTICAL, COMBINE, PAINT]
+    random.seed(23)
+    board = generate_board(2, 512)
+    listed = legal_moves(board, COLOUR_LIST[0], moves)
+    candidates = player._distinct_candidates(board, moves)
+    assert all(move in listed for move in candidates)
+    assert len(candidates) == sum(1 for move in listed
+                                  if not _changes_nothing(move))
+    player = SmartPlayer(0, PerimeterGoal(COLOUR_LIST[0]), 50,
+                         SearchOptions(exhaustive=True))
+    board = generate_board(5, 512)
+    candidates = player._distinct_candidates(board, moves)
+    assert 0 < len(candidates) <= 50
+    assert len({(name, direction, id(block))
+                for name, direction, block in candidates}) == len(candidates)
+
+
+def test_smart_player_budget() -> None:
+    """Test a SmartPlayer with a time budget.
+    - with no time to spare, exactly one candidate is scored
+    - with a budget, more candidates than the difficulty can be scored
+    - an exhaustive player with a budget scores no more than the legal moves
+    - the number of candidates is recorded for every turn, in order
+    - a player cannot have both a budget and workers
+    """
+    random.seed(24)
+    board = generate_board(3, 512)
+    player = SmartPlayer(0, BlobGoal(COLOUR_LIST[0]), 1,
+                         SearchOptions(budget=0.0))
+    player._proceed = True
+    player.generate_move(board)
+    assert player.evaluations_per_turn == [1]
+    player._options.budget = 0.02
+    player._proceed = True
+    player.generate_move(board)
+    assert len(player.evaluations_per_turn) == 2
+    assert player.evaluations_per_turn[1] > 1
+    player = SmartPlayer(0, BlobGoal(COLOUR_LIST[0]), 1000,
+                         SearchOptions(exhaustive=True, budget=0.5))
+    player._proceed = True
+    player.generate_move(board)
+    moves = [SMASH, ROTATE_CLOCKWISE, ROTATE_COUNTER_CLOCKWISE,
+             SWAP_HORIZONTAL, SWAP_VERTICAL, COMBINE, PAINT]
+    assert player.evaluations_per_turn[0] <= \
+        board.count_moves(moves, COLOUR_LIST[0])
+    with pytest.raises(ValueError):
+        SearchOptions(workers=2, budget=0.1)
+
+
+def test_beam_player() -> None:
+    """Test BeamPlayer.
+    - looking one move ahead on a board without smashes, the move played has
+      the best score less its penalty of all legal moves, or the player
+      passes if none beats the current score
+    - looking three moves ahead, the move played is legal or a pass, the
+      board is not changed and the rate of moves scored is recorded
+    """
+    moves = [SMASH, ROTATE_CLOCKWISE, ROTATE_COUNTER_CLOCKWISE,
+             SWAP_HORIZONTAL, SWAP_VERTICAL, COMBINE, PAINT]
+    goal = PerimeterGoal(COLOUR_LIST[0])
+    random.seed(25)
+    board = generate_board(2, 512)
+    _smash_to_unit_cells(board)
+    player = BeamPlayer(0, goal, 1000, plies=1)
+    player._proceed = True
+    move = player.generate_move(board)
+    values = [goal.score_delta(board, legal) - ACTION_PENALTY[legal[:2]]
+              for legal in legal_moves(board, COLOUR_LIST[0], moves)]
+    if move[:2] == PASS:
+        assert max(values) <= 0
+    else:
+        assert goal.score_delta(board, move) - ACTION_PENALTY[move[:2]] == \
+            max(values)
+    board = generate_board(3, 512)
+    original = board.create_copy()
+    player = BeamPlayer(0, BlobGoal(COLOUR_LIST[1]), 20, plies=3,
+                        beam_width=3)
+    player._proceed = True
+    move = player.generate_move(board)
+    assert board == original
+    assert move[:2] == PASS or \
+        move in legal_moves(board, COLOUR_LIST[1], moves)
+    assert player.nodes_per_second > 0
+    assert player.evaluations_per_turn[0] <= 20 + 2 * 3 * 20
 
 
 if __name__ == '__main__':